@@ -7,6 +7,26 @@ import random
 from datetime import datetime, timedelta
 import os
 import csv
+import hashlib
+import json
+import atexit
+import weakref
+import copy
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from collections import Counter, OrderedDict
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: whole-file locks through msvcrt instead
+    fcntl = None
+    import msvcrt
 
 # Define constants
 NUM_JOBS = 1000
@@ -109,6 +129,128 @@ for skills in TECHNICAL_SKILLS.values():
     ALL_TECHNICAL_SKILLS.extend(skills)
 ALL_TECHNICAL_SKILLS = sorted(list(set(ALL_TECHNICAL_SKILLS)))
 
+# Known values of the single-valued columns, stored as categoricals
+CATEGORY_VOCABULARIES = {
+    "title": sorted(set(title for titles in CAREER_CLUSTERS.values() for title in titles)),
+    "career_cluster": list(CAREER_CLUSTERS.keys()),
+    "region": REGIONS,
+    "city": [city for region in REGIONS for city in CITIES[region]],
+    "experience_level": EXPERIENCE_LEVELS,
+    "education_required": EDUCATION_LEVELS,
+    "work_arrangement": WORK_ARRANGEMENTS,
+    "company_size": COMPANY_SIZES,
+    "industry_growth": INDUSTRY_GROWTH,
+    "posting_date": []
+}
+
+# Known items of the comma-joined list columns, stored as integer code arrays
+LIST_VOCABULARIES = {
+    "technical_skills": ALL_TECHNICAL_SKILLS,
+    "soft_skills": SOFT_SKILLS,
+    "preferred_traits": PERSONALITY_TRAITS
+}
+
+# Engagement signals precomputed for every job (see engagement_features)
+ENGAGEMENT_FEATURES = ["save_rate", "views_per_application", "recency"]
+
+# Days after which a posting's recency has halved
+ENGAGEMENT_HALF_LIFE_DAYS = 14
+
+# Reference day of the precomputed recency terms, so frames indexed on different
+# days share one scale; any fixed day within a few decades of the postings works
+ENGAGEMENT_EPOCH = pd.Timestamp("2025-01-01")
+
+# Views per application at which that signal reaches 0.5
+VIEWS_PER_APPLICATION_SCALE = 10
+
+# Weights of the engagement ranking mode: a multiplier for the relevance score and
+# one weight per engagement feature; weights a request leaves out take these values
+DEFAULT_ENGAGEMENT_WEIGHTS = {
+    "relevance": 1.0,
+    "save_rate": 8.0,
+    "views_per_application": 3.0,
+    "recency": 4.0
+}
+
+# Integer columns downcast to the smallest type that fits
+INTEGER_COLUMNS = ["job_id", "salary", "applications_received", "job_views"]
+
+# Bumped whenever the compact schema changes, so older snapshots are rebuilt
+SCHEMA_VERSION = 1
+
+# Rows per Parquet row group in the snapshot, the unit streamed from disk
+SNAPSHOT_ROW_GROUP_SIZE = 100000
+
+class Trace:
+    """Timing spans and counters recorded while tracing is on (see tracing)"""
+    
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.spans = []
+        self.counters = Counter()
+        self.depth = 0
+    
+    @contextmanager
+    def span(self, name, **fields):
+        start = time.perf_counter()
+        self.depth += 1
+        try:
+            yield
+        finally:
+            self.depth -= 1
+            end = time.perf_counter()
+            # Spans are recorded as they finish; sort on start_ms for a timeline
+            self.spans.append({
+                "name": name,
+                "depth": self.depth,
+                "start_ms": (start - self.start) * 1000,
+                "duration_ms": (end - start) * 1000,
+                **fields
+            })
+    
+    def count(self, name, value=1):
+        self.counters[name] += int(value)
+    
+    # Spans in start order followed by the counters, as structured log records
+    def records(self):
+        spans = sorted(self.spans, key=lambda span: span["start_ms"])
+        counters = [{"counter": name, "value": value} for name, value in self.counters.items()]
+        return [{"type": "span", **span} for span in spans] + [{"type": "counter", **counter} for counter in counters]
+    
+    def to_json_lines(self):
+        return "".join(json.dumps(record) + "\n" for record in self.records())
+
+# Trace of the current thread, or None when tracing is off. It lives on the thread
+# rather than in a global so that cached objects built by an earlier Streamlit run
+# (whose functions see that run's globals) record into it too
+def current_trace():
+    return getattr(threading.current_thread(), "job_trace", None)
+
+@contextmanager
+def tracing():
+    """Record spans and counters from this thread into a new Trace"""
+    thread = threading.current_thread()
+    previous = getattr(thread, "job_trace", None)
+    thread.job_trace = Trace()
+    try:
+        yield thread.job_trace
+    finally:
+        thread.job_trace = previous
+
+# Shared no-op context, so a span costs one attribute lookup while tracing is off
+NO_SPAN = nullcontext()
+
+# Time a block as a named span of the current trace, if any
+def trace_span(name, **fields):
+    trace = current_trace()
+    return NO_SPAN if trace is None else trace.span(name, **fields)
+
+# Add to a named counter of the current trace, if any
+def trace_count(name, value=1):
+    trace = current_trace()
+    if trace is not None:
+        trace.count(name, value)
+
 # Generate a datetime within the last month
 def random_date():
     now = datetime.now()
@@ -190,6 +332,677 @@ def generate_job_postings(num_jobs):
     
     return jobs
 
+# Join the first counts[i] picked names of every row with ", "
+def join_picked_names(names, picks, counts):
+    joined = np.empty(len(picks), dtype=object)
+    for count in np.unique(counts):
+        rows = np.flatnonzero(counts == count)
+        text = names[picks[rows, 0]]
+        for j in range(1, count):
+            text = text + ", " + names[picks[rows, j]]
+        joined[rows] = text
+    return joined
+
+# Sample between low and high distinct names per row, in random order
+def sample_names(rng, names, low, high, num_rows):
+    counts = np.minimum(rng.integers(low, high + 1, num_rows), len(names))
+    picks = np.argsort(rng.random((num_rows, len(names))), axis=1)[:, :high]
+    return join_picked_names(np.asarray(names, dtype=object), picks, counts)
+
+# Generate job data in bulk, one whole column at a time
+def generate_job_frame(num_jobs, rng, start_id=1, today=None):
+    """
+    Vectorized counterpart of generate_job_postings
+    
+    Parameters:
+    num_jobs - number of postings to generate
+    rng - numpy Generator that drives every random choice
+    start_id - job_id of the first posting
+    today - date the posting dates count back from (defaults to today)
+    
+    Returns:
+    DataFrame with the same columns and distributions as generate_job_postings
+    """
+    today = today or datetime.now()
+    job_ids = np.arange(start_id, start_id + num_jobs)
+    
+    # Select cluster and job title
+    clusters = np.asarray(list(CAREER_CLUSTERS.keys()), dtype=object)
+    cluster_codes = rng.integers(0, len(clusters), num_jobs)
+    titles = np.empty(num_jobs, dtype=object)
+    technical_skills = np.empty(num_jobs, dtype=object)
+    for code, cluster in enumerate(clusters):
+        rows = np.flatnonzero(cluster_codes == code)
+        cluster_titles = np.asarray(CAREER_CLUSTERS[cluster], dtype=object)
+        titles[rows] = cluster_titles[rng.integers(0, len(cluster_titles), len(rows))]
+        # Select required technical skills (3-6 skills)
+        technical_skills[rows] = sample_names(rng, TECHNICAL_SKILLS[cluster], 3, 6, len(rows))
+    
+    # Select experience level and corresponding salary
+    experience_codes = rng.integers(0, len(EXPERIENCE_LEVELS), num_jobs)
+    salary_min = np.array([SALARY_RANGES[level]["min"] for level in EXPERIENCE_LEVELS])
+    salary_max = np.array([SALARY_RANGES[level]["max"] for level in EXPERIENCE_LEVELS])
+    salaries = rng.integers(salary_min[experience_codes], salary_max[experience_codes] + 1)
+    experience_levels = np.asarray(EXPERIENCE_LEVELS, dtype=object)[experience_codes]
+    
+    # Select region and city
+    region_codes = rng.integers(0, len(REGIONS), num_jobs)
+    cities = np.empty(num_jobs, dtype=object)
+    for code, region in enumerate(REGIONS):
+        rows = np.flatnonzero(region_codes == code)
+        region_cities = np.asarray(CITIES[region], dtype=object)
+        cities[rows] = region_cities[rng.integers(0, len(region_cities), len(rows))]
+    
+    # Select soft skills (2-4) and personality traits (2-3)
+    soft_skills = sample_names(rng, SOFT_SKILLS, 2, 4, num_jobs)
+    personality_traits = sample_names(rng, PERSONALITY_TRAITS, 2, 3, num_jobs)
+    
+    # Job engagement metrics (for popularity/demand)
+    applications = rng.integers(10, 501, num_jobs)
+    views = applications * rng.integers(5, 16, num_jobs)
+    save_rates = np.round(rng.uniform(0.05, 0.4, num_jobs), 2)
+    
+    # Posting dates within the last month
+    dates = np.array([(today - timedelta(days=days)).strftime("%Y-%m-%d") for days in range(31)], dtype=object)
+    posting_dates = dates[rng.integers(1, 31, num_jobs)]
+    
+    def choose(values):
+        return np.asarray(values, dtype=object)[rng.integers(0, len(values), num_jobs)]
+    
+    return pd.DataFrame({
+        "job_id": job_ids,
+        "title": titles,
+        "career_cluster": clusters[cluster_codes],
+        "company_name": "Company " + job_ids.astype(str).astype(object),
+        "region": np.asarray(REGIONS, dtype=object)[region_codes],
+        "city": cities,
+        "salary": salaries,
+        "experience_level": experience_levels,
+        "education_required": choose(EDUCATION_LEVELS),
+        "technical_skills": technical_skills,
+        "soft_skills": soft_skills,
+        "preferred_traits": personality_traits,
+        "work_arrangement": choose(WORK_ARRANGEMENTS),
+        "company_size": choose(COMPANY_SIZES),
+        "industry_growth": choose(INDUSTRY_GROWTH),
+        "posting_date": posting_dates,
+        "applications_received": applications,
+        "job_views": views,
+        "save_rate": save_rates,
+        "job_description": "This is a " + experience_levels + " " + titles + " position requiring expertise in "
+            + technical_skills + ". The ideal candidate should have strong " + soft_skills
+            + " skills and be " + personality_traits + "."
+    })
+
+# Generate a large dataset as a sequence of frames
+def generate_job_chunks(num_jobs, seed=None, chunk_size=500000, today=None):
+    rng = np.random.default_rng(seed)
+    today = today or datetime.now()
+    for start in range(0, num_jobs, chunk_size):
+        yield generate_job_frame(min(chunk_size, num_jobs - start), rng, start + 1, today)
+
+# Write a large generated dataset to CSV without holding it all in memory
+def write_job_postings(csv_file, num_jobs, seed=None, chunk_size=500000, today=None):
+    writer = None
+    for chunk in generate_job_chunks(num_jobs, seed, chunk_size, today):
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if writer is None:
+            writer = pacsv.CSVWriter(csv_file, table.schema, write_options=pacsv.WriteOptions(quoting_style="needed"))
+        writer.write_table(table)
+    if writer is not None:
+        writer.close()
+
+# Number of set bits in every possible byte, used to popcount bitsets
+POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+# Split a list column into (row, item code) pairs
+def encode_list_codes(column, vocabulary):
+    """
+    Encode a list column as item codes
+    
+    Parameters:
+    column - Series of ", "-joined strings (NaN for a missing list), or a
+             compact Series of integer code arrays over vocabulary
+    vocabulary - list of known items, extended with any unknown items found
+    
+    Returns:
+    (rows, codes, vocabulary) with one entry per listed item
+    """
+    vocabulary = list(vocabulary)
+    if isinstance(column.dtype, pd.ArrowDtype):
+        lists = column.array.__arrow_array__()
+        rows = pc.list_parent_indices(lists).to_numpy().astype(np.int64)
+        codes = pc.list_flatten(lists).to_numpy().astype(np.int64)
+        return rows, codes, vocabulary
+    
+    # A column with every list missing may have been read as floats
+    items = column.reset_index(drop=True).astype(object).str.split(", ").explode().dropna()
+    rows = items.index.to_numpy(dtype=np.int64)
+    values = items.to_numpy(dtype=object)
+    
+    # Unknown items get appended to the vocabulary so no list entry is lost
+    codes = pd.Categorical(values, categories=vocabulary).codes.astype(np.int64)
+    if (codes < 0).any():
+        vocabulary.extend(sorted(set(values[codes < 0])))
+        codes = pd.Categorical(values, categories=vocabulary).codes.astype(np.int64)
+    return rows, codes, vocabulary
+
+# Encode a list column as one bitset row per job
+def encode_list_column(column, vocabulary):
+    """
+    Encode a list column as bitsets
+    
+    Returns:
+    (bits, vocabulary) where bits is a (rows, words) uint64 array and bit i
+    of a row is set when the job lists vocabulary[i]
+    """
+    rows, codes, vocabulary = encode_list_codes(column, vocabulary)
+    num_words = max(1, (len(vocabulary) + 63) // 64)
+    bits = np.zeros((len(column), num_words), dtype=np.uint64)
+    np.bitwise_or.at(bits, (rows, codes // 64), np.left_shift(np.uint64(1), (codes % 64).astype(np.uint64)))
+    return bits, vocabulary
+
+# Encode a single-valued column as small integer codes (-1 when missing)
+def encode_value_column(column, vocabulary):
+    vocabulary = list(vocabulary)
+    extra = sorted(set(column.dropna().unique()) - set(vocabulary))
+    vocabulary.extend(extra)
+    codes = pd.Categorical(column, categories=vocabulary).codes
+    return np.asarray(codes), vocabulary
+
+# Vocabulary the integer codes of a list column refer to
+def list_vocabulary(jobs_df, column):
+    return jobs_df.attrs.get("list_vocabularies", {}).get(column, LIST_VOCABULARIES[column])
+
+# Convert a postings frame to the compact schema
+def apply_job_schema(jobs_df):
+    """
+    Convert a postings frame to its compact schema
+    
+    Single-valued columns become categoricals over CATEGORY_VOCABULARIES, integer
+    columns are downcast, and list columns become integer code arrays over
+    LIST_VOCABULARIES. Values missing from a vocabulary are appended to it, and the
+    list vocabularies are kept in jobs_df.attrs["list_vocabularies"].
+    """
+    compact = jobs_df.reset_index(drop=True)
+    
+    for column, vocabulary in CATEGORY_VOCABULARIES.items():
+        if column in compact:
+            extra = sorted(set(compact[column].dropna().unique()) - set(vocabulary))
+            compact[column] = pd.Categorical(compact[column], categories=list(vocabulary) + extra)
+    
+    for column in INTEGER_COLUMNS:
+        if column in compact and not compact[column].isna().any():
+            compact[column] = pd.to_numeric(compact[column], downcast="integer")
+    
+    vocabularies = {}
+    for column in LIST_VOCABULARIES:
+        if column in compact:
+            rows, codes, vocabularies[column] = encode_list_codes(compact[column], list_vocabulary(compact, column))
+            offsets = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=len(compact)))])
+            lists = pa.ListArray.from_arrays(
+                pa.array(offsets, type=pa.int32()),
+                pa.array(codes, type=pa.int16()),
+                mask=pa.array(compact[column].isna().to_numpy())
+            )
+            compact[column] = pd.arrays.ArrowExtensionArray(lists)
+    compact.attrs["list_vocabularies"] = vocabularies
+    
+    return compact
+
+# Turn integer code arrays back into comma-joined strings, for display
+def decode_list_columns(jobs_df):
+    for column in LIST_VOCABULARIES:
+        if column in jobs_df and isinstance(jobs_df[column].dtype, pd.ArrowDtype):
+            rows, codes, vocabulary = encode_list_codes(jobs_df[column], list_vocabulary(jobs_df, column))
+            items = pd.Series(np.asarray(vocabulary, dtype=object)[codes])
+            joined = items.groupby(rows).agg(", ".join)
+            decoded = pd.Series(np.nan, index=range(len(jobs_df)), dtype=object)
+            decoded[joined.index] = joined.to_numpy()
+            decoded[jobs_df[column].isna().to_numpy()] = np.nan
+            jobs_df[column] = decoded.to_numpy()
+    return jobs_df
+
+# Read a compact snapshot written with DataFrame.to_parquet
+def read_job_snapshot(path):
+    table = pq.read_table(path)
+    return arrow_to_job_frame(table, snapshot_attrs(table.schema))
+
+# Frame attrs (list vocabularies, source fingerprint) stored in a snapshot schema
+def snapshot_attrs(schema):
+    return json.loads((schema.metadata or {}).get(b"PANDAS_ATTRS", b"{}"))
+
+# Convert an Arrow table or record batch of compact postings to a frame
+def arrow_to_job_frame(data, attrs):
+    # The pandas metadata cannot rebuild nested Arrow dtypes, so map them directly
+    jobs_df = data.to_pandas(
+        ignore_metadata=True,
+        types_mapper=lambda arrow_type: pd.ArrowDtype(arrow_type) if pa.types.is_list(arrow_type) else None
+    )
+    jobs_df.attrs = attrs
+    return jobs_df
+
+# Inverted index over a bitset column: item code -> sorted job positions
+def build_list_postings(bits, num_items):
+    postings = []
+    for code in range(num_items):
+        word = bits[:, code // 64]
+        postings.append(np.flatnonzero((word >> np.uint64(code % 64)) & np.uint64(1)))
+    return postings
+
+# Inverted index over a code column: value code -> sorted job positions
+def build_value_postings(codes, num_values):
+    order = np.argsort(codes, kind='stable')
+    counts = np.bincount(codes[codes >= 0], minlength=num_values)
+    # Missing values (-1) sort first and are skipped
+    start = int((codes < 0).sum())
+    return np.split(order[start:], np.cumsum(counts)[:-1])
+
+# Posting dates as datetimes, parsing each distinct date once for categoricals
+def posting_dates(column):
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        categories = pd.to_datetime(pd.Series(column.cat.categories), errors='coerce')
+        codes = column.cat.codes.to_numpy()
+        dates = categories.to_numpy()[np.maximum(codes, 0)] if len(categories) else np.full(len(column), np.datetime64('NaT'), dtype='datetime64[ns]')
+        return pd.Series(np.where(codes >= 0, dates, np.datetime64('NaT')), index=column.index)
+    return pd.to_datetime(column, errors='coerce')
+
+def engagement_features(jobs_df, today=None):
+    """
+    Engagement and freshness signals of every job, computed in bulk
+    
+    Returns:
+    float64 array with one column per ENGAGEMENT_FEATURES entry:
+    - save_rate: share of viewers who saved the posting, in [0, 1]
+    - views_per_application: views per application, squashed as v / (v + VIEWS_PER_APPLICATION_SCALE)
+    - recency: 2 ** (days from ENGAGEMENT_EPOCH to the posting date / ENGAGEMENT_HALF_LIFE_DAYS),
+      which recency_factor scales into the decay of the posting's age on the day
+      of each request; postings dated after today count as posted today
+    Missing values, and missing columns, count as 0.
+    """
+    today = pd.Timestamp(today or datetime.now()).normalize()
+    
+    def values(column):
+        if column not in jobs_df:
+            return np.zeros(len(jobs_df))
+        return jobs_df[column].to_numpy(dtype=np.float64, na_value=0)
+    
+    save_rate = values('save_rate').clip(0, 1)
+    views_per_application = values('job_views') / np.maximum(values('applications_received'), 1)
+    views_per_application = views_per_application / (views_per_application + VIEWS_PER_APPLICATION_SCALE)
+    
+    days = np.full(len(jobs_df), -np.inf)
+    if 'posting_date' in jobs_df:
+        dates = posting_dates(jobs_df['posting_date'])
+        days = (dates.mask(dates > today, today) - ENGAGEMENT_EPOCH).dt.days.to_numpy(dtype=np.float64, na_value=-np.inf)
+    recency = np.exp2(days / ENGAGEMENT_HALF_LIFE_DAYS)
+    
+    return np.column_stack([save_rate, views_per_application, recency])
+
+class JobIndex:
+    """Encoded view of a job postings frame, built once per dataset"""
+    
+    def __init__(self, jobs_df):
+        self.size = len(jobs_df)
+        self.technical_skills, self.skill_vocabulary = encode_list_column(jobs_df['technical_skills'], list_vocabulary(jobs_df, 'technical_skills'))
+        self.soft_skills, self.soft_skill_vocabulary = encode_list_column(jobs_df['soft_skills'], list_vocabulary(jobs_df, 'soft_skills'))
+        self.traits, self.trait_vocabulary = encode_list_column(jobs_df['preferred_traits'], list_vocabulary(jobs_df, 'preferred_traits'))
+        self.regions, self.region_vocabulary = encode_value_column(jobs_df['region'], REGIONS)
+        self.experience_levels, self.experience_vocabulary = encode_value_column(jobs_df['experience_level'], EXPERIENCE_LEVELS)
+        self.work_arrangements, self.work_arrangement_vocabulary = encode_value_column(jobs_df['work_arrangement'], WORK_ARRANGEMENTS)
+        self.salaries = jobs_df['salary'].to_numpy()
+        self.engagement = engagement_features(jobs_df)
+        self.engagement_max = self.engagement.max(axis=0) if self.size else np.zeros(len(ENGAGEMENT_FEATURES))
+        
+        # Inverted index used to prune the jobs that need scoring
+        self.skill_postings = build_list_postings(self.technical_skills, len(self.skill_vocabulary))
+        self.trait_postings = build_list_postings(self.traits, len(self.trait_vocabulary))
+        self.region_postings = build_value_postings(self.regions, len(self.region_vocabulary))
+        self.experience_postings = build_value_postings(self.experience_levels, len(self.experience_vocabulary))
+    
+    # Mark every job that appears in the posting lists of the given items
+    def mark_postings(self, mask, postings, vocabulary, items):
+        lookup = {item: code for code, item in enumerate(vocabulary)}
+        for item in items:
+            if item in lookup:
+                mask[postings[lookup[item]]] = True
+        return mask
+    
+    # Count, for every job, how many of the given items its bitset contains
+    def count_matches(self, bits, vocabulary, items, positions=None):
+        if positions is not None:
+            bits = bits[positions]
+        matches = np.zeros(len(bits), dtype=np.int64)
+        
+        # Items listed several times count several times, so group them by multiplicity
+        lookup = {item: code for code, item in enumerate(vocabulary)}
+        multiplicity = {}
+        for item in items:
+            if item in lookup:
+                multiplicity[lookup[item]] = multiplicity.get(lookup[item], 0) + 1
+        for times in set(multiplicity.values()):
+            mask = np.zeros(bits.shape[1], dtype=np.uint64)
+            for code, count in multiplicity.items():
+                if count == times:
+                    mask[code // 64] |= np.uint64(1) << np.uint64(code % 64)
+            overlap = np.ascontiguousarray(bits & mask)
+            matches += POPCOUNT_TABLE[overlap.view(np.uint8)].reshape(len(bits), bits.shape[1] * 8).sum(axis=1, dtype=np.int64) * times
+        return matches
+    
+    # Mark the jobs whose single-valued code is one of the given values
+    def value_matches(self, codes, vocabulary, values, positions=None):
+        if positions is not None:
+            codes = codes[positions]
+        wanted = [code for code, value in enumerate(vocabulary) if value in values]
+        return np.isin(codes, wanted).astype(np.int64)
+
+# Derived structures are stored on the frame object itself: they are not copied
+# with the frame, go away with it, and survive Streamlit reruns, which rebuild this
+# script's globals (so a module-level cache would start empty on every rerun)
+def cached_for_frame(jobs_df, name, build):
+    cached = jobs_df.__dict__.get(name)
+    if cached is None:
+        cached = build(jobs_df)
+        object.__setattr__(jobs_df, name, cached)
+    return cached
+
+def get_job_index(jobs_df):
+    """Return the JobIndex for a frame, building it on first use"""
+    return cached_for_frame(jobs_df, "_job_index", JobIndex)
+
+class JobAggregates:
+    """Analytics tab statistics, updated incrementally as postings come and go"""
+    
+    def __init__(self, jobs_df=None):
+        self.count = 0
+        self.salary_count = 0
+        self.salary_sum = 0
+        self.cluster_counts = Counter()
+        self.experience_counts = Counter()
+        self.skill_counts = Counter()
+        if jobs_df is not None:
+            self.add(jobs_df)
+    
+    def add(self, jobs_df):
+        self.update(jobs_df, 1)
+    
+    def remove(self, jobs_df):
+        self.update(jobs_df, -1)
+    
+    def update(self, jobs_df, sign):
+        self.count += sign * len(jobs_df)
+        self.salary_count += sign * int(jobs_df['salary'].count())
+        self.salary_sum += sign * int(jobs_df['salary'].sum())
+        
+        for counts, column in [(self.cluster_counts, 'career_cluster'), (self.experience_counts, 'experience_level')]:
+            for value, count in jobs_df[column].value_counts().items():
+                counts[value] += sign * int(count)
+        
+        _, codes, vocabulary = encode_list_codes(jobs_df['technical_skills'], list_vocabulary(jobs_df, 'technical_skills'))
+        for code, count in enumerate(np.bincount(codes, minlength=len(vocabulary))):
+            self.skill_counts[vocabulary[code]] += sign * int(count)
+        
+        # Values no posting has any more are dropped
+        for counts in [self.cluster_counts, self.experience_counts, self.skill_counts]:
+            for value in [value for value, count in counts.items() if count <= 0]:
+                del counts[value]
+    
+    def average_salary(self):
+        return self.salary_sum / self.salary_count if self.salary_count else 0
+    
+    # Counts as a Series for charts, most frequent first
+    @staticmethod
+    def ranked(counts, limit=None):
+        series = pd.Series(counts, dtype=np.int64).sort_values(ascending=False, kind='stable')
+        return series if limit is None else series.head(limit)
+
+def get_job_aggregates(jobs_df):
+    """Return the JobAggregates for a frame, computing them on first use"""
+    return cached_for_frame(jobs_df, "_job_aggregates", JobAggregates)
+
+# Salary histogram bins of the skill salary aggregates: $1,000 wide, the last one open-ended
+SALARY_BIN_WIDTH = 1000
+SALARY_BINS = 500
+
+# Number of postings listing both of two items, from (row, item code) pairs grouped by row
+def pair_counts(rows, codes, size):
+    counts = np.zeros(size * size, dtype=np.int64)
+    if len(rows) == 0:
+        return counts.reshape(size, size)
+    
+    # Items of one row are adjacent, so pairs are at most the longest list apart
+    for distance in range(1, int(np.bincount(rows).max())):
+        same = rows[distance:] == rows[:-distance]
+        first, second = codes[:-distance][same], codes[distance:][same]
+        counts += np.bincount(first * size + second, minlength=size * size)
+        counts += np.bincount(second * size + first, minlength=size * size)
+    return counts.reshape(size, size)
+
+# Median value of every group, ignoring NaN values; NaN for groups without values
+def group_medians(keys, values, num_groups):
+    valid = ~np.isnan(values)
+    keys, values = keys[valid], values[valid]
+    counts = np.bincount(keys, minlength=num_groups)
+    if len(values) == 0:
+        return np.full(num_groups, np.nan)
+    values = values[np.lexsort((values, keys))]
+    starts = np.cumsum(counts) - counts
+    low = np.minimum(starts + np.maximum(counts - 1, 0) // 2, len(values) - 1)
+    high = np.minimum(starts + counts // 2, len(values) - 1)
+    return np.where(counts > 0, (values[low] + values[high]) / 2, np.nan)
+
+# Median salaries of salary histograms (last axis), at bin centres; NaN when empty
+def histogram_medians(histograms):
+    counts = histograms.sum(axis=-1)
+    median_bins = (histograms.cumsum(axis=-1) * 2 < counts[..., None]).sum(axis=-1)
+    return np.where(counts > 0, (median_bins + 0.5) * SALARY_BIN_WIDTH, np.nan)
+
+class SkillGapIndex:
+    """
+    Technical skill co-occurrence and salary aggregates of a postings frame
+    
+    rows and codes list every (posting, skill) pair. The co-occurrence matrix
+    counts the postings listing both of two skills, and the salary histograms
+    are kept per skill and career cluster and per skill and experience level,
+    so the aggregates of several frames combine by adding them up.
+    """
+    
+    def __init__(self, jobs_df):
+        index = get_job_index(jobs_df)
+        self.skill_vocabulary = index.skill_vocabulary
+        self.rows, self.codes, _ = encode_list_codes(jobs_df['technical_skills'], index.skill_vocabulary)
+        self.skill_totals = np.bincount(self.rows, minlength=len(jobs_df))
+        self.salaries = jobs_df['salary'].to_numpy(dtype=np.float64, na_value=np.nan)
+        self.cooccurrence = pair_counts(self.rows, self.codes, len(self.skill_vocabulary))
+        
+        clusters, self.cluster_vocabulary = encode_value_column(jobs_df['career_cluster'], list(CAREER_CLUSTERS))
+        self.experience_vocabulary = index.experience_vocabulary
+        salary_bins = np.clip(np.nan_to_num(self.salaries) // SALARY_BIN_WIDTH, 0, SALARY_BINS - 1).astype(np.int64)
+        self.cluster_salaries = self.salary_histograms(clusters, len(self.cluster_vocabulary), salary_bins)
+        self.experience_salaries = self.salary_histograms(index.experience_levels, len(self.experience_vocabulary), salary_bins)
+    
+    # (skills, groups, SALARY_BINS) counts of postings by skill, group and salary bin
+    def salary_histograms(self, groups, num_groups, salary_bins):
+        keep = (groups[self.rows] >= 0) & ~np.isnan(self.salaries[self.rows])
+        rows, codes = self.rows[keep], self.codes[keep]
+        keys = (codes * num_groups + groups[rows]) * SALARY_BINS + salary_bins[rows]
+        size = len(self.skill_vocabulary) * num_groups * SALARY_BINS
+        return np.bincount(keys, minlength=size).reshape(len(self.skill_vocabulary), num_groups, SALARY_BINS)
+    
+    def gaps(self, held, keep, coverage=0.5):
+        """
+        How far every posting is from qualifying, for a set of held skills
+        
+        A posting qualifies when the held skills cover at least the coverage share
+        of the technical skills it lists; postings listing none are left out.
+        
+        Parameters:
+        held - boolean array over skill_vocabulary
+        keep - boolean array of the postings to consider (e.g. filter_mask)
+        
+        Returns:
+        (qualified, need_one, need_two): boolean arrays over the postings that
+        qualify, or need one or two more skills to
+        """
+        held_counts = np.bincount(self.rows, weights=held[self.codes], minlength=len(keep))
+        needed = np.ceil(coverage * self.skill_totals - 1e-9) - held_counts
+        keep = keep & (self.skill_totals > 0)
+        return keep & (needed <= 0), keep & (needed == 1), keep & (needed == 2)
+
+def get_skill_gap_index(jobs_df):
+    """Return the SkillGapIndex for a frame, building it on first use"""
+    return cached_for_frame(jobs_df, "_skill_gap_index", SkillGapIndex)
+
+def suggest_skills(frames, user_profile, k=10, work_arrangements=None, min_salary=None, coverage=0.5):
+    """
+    Rank the one or two skills to learn next by the postings they would unlock
+    
+    One vectorized pass over the (posting, skill) pairs finds, for every skill,
+    the postings one skill short of qualifying that it completes, and the
+    co-occurrence of missing skills among postings one or two short gives the
+    gain of every pair. Pairs are only suggested for skills postings list
+    together (per the precomputed co-occurrence matrix).
+    
+    Parameters:
+    frames - postings frames (e.g. JobStore.frames())
+    user_profile - profile whose 'skills' and 'experience_level' are used
+    k - number of suggestions of each size (one skill, two skills)
+    work_arrangements, min_salary - additional filters, as for recommend_top_jobs;
+        with min_salary only high-salary postings count as matches
+    coverage - share of a posting's technical skills needed to qualify for it
+    
+    Returns:
+    (suggestions, current matches) where suggestions is a DataFrame with
+    skills, num_skills, new_matches, median_salary (of the postings unlocked),
+    typical_salary (median for the skills at the profile's experience level)
+    and top_cluster, ordered by num_skills, then most new matches
+    """
+    indexes = [get_skill_gap_index(frame) for frame in frames]
+    vocabulary = list(dict.fromkeys(skill for index in indexes for skill in index.skill_vocabulary))
+    lookup = {skill: code for code, skill in enumerate(vocabulary)}
+    size = len(vocabulary)
+    held = np.zeros(size, dtype=bool)
+    held[[lookup[skill] for skill in user_profile['skills'] if skill in lookup]] = True
+    
+    matches = 0
+    single_gains = np.zeros(size, dtype=np.int64)
+    one_short_pairs = np.zeros((size, size), dtype=np.int64)
+    two_short_pairs = np.zeros((size, size), dtype=np.int64)
+    cooccurrence = np.zeros((size, size), dtype=np.int64)
+    cluster_salaries = {}
+    experience_salaries = np.zeros((size, SALARY_BINS), dtype=np.int64)
+    unlocked = []
+    for frame, index in zip(frames, indexes):
+        # Frame skill codes -> combined vocabulary codes
+        mapping = np.array([lookup[skill] for skill in index.skill_vocabulary], dtype=np.int64)
+        codes = mapping[index.codes]
+        qualified, need_one, need_two = index.gaps(held[mapping], filter_mask(frame, work_arrangements, min_salary), coverage)
+        matches += int(qualified.sum())
+        
+        # Missing skills of the postings one and two skills short
+        missing = ~held[codes]
+        one_short = need_one[index.rows] & missing
+        two_short = need_two[index.rows] & missing
+        single_gains += np.bincount(codes[one_short], minlength=size)
+        one_short_pairs += pair_counts(index.rows[one_short], codes[one_short], size)
+        two_short_pairs += pair_counts(index.rows[two_short], codes[two_short], size)
+        unlocked.append((index.rows[one_short], codes[one_short], index.rows[two_short], codes[two_short], index.salaries))
+        
+        # Aggregates of the frame, moved to the combined vocabulary
+        np.add.at(cooccurrence, (mapping[:, None], mapping[None, :]), index.cooccurrence)
+        for number, cluster in enumerate(index.cluster_vocabulary):
+            cluster_salaries.setdefault(cluster, np.zeros((size, SALARY_BINS), dtype=np.int64))
+            cluster_salaries[cluster][mapping] += index.cluster_salaries[:, number]
+        if user_profile['experience_level'] in index.experience_vocabulary:
+            experience_salaries[mapping] += index.experience_salaries[:, index.experience_vocabulary.index(user_profile['experience_level'])]
+    
+    # A pair unlocks what either skill unlocks alone, once, plus the postings needing both
+    pair_gains = single_gains[:, None] + single_gains[None, :] - one_short_pairs + two_short_pairs
+    candidates = ~held[:, None] & ~held[None, :] & (cooccurrence > 0) & np.triu(np.ones((size, size), dtype=bool), 1)
+    firsts, seconds = np.nonzero(candidates)
+    pair_order = np.lexsort((seconds, firsts, -pair_gains[firsts, seconds]))[:k]
+    singles = np.flatnonzero(~held)
+    single_order = np.lexsort((singles, -single_gains[singles]))[:k]
+    chosen = [(code,) for code in singles[single_order] if single_gains[code] > 0]
+    chosen += [(firsts[number], seconds[number]) for number in pair_order if pair_gains[firsts[number], seconds[number]] > 0]
+    
+    # Median salaries of the postings unlocked: for all single skills at once, then per pair shown
+    single_medians = group_medians(
+        np.concatenate([one_codes for _, one_codes, _, _, _ in unlocked] + [np.empty(0, dtype=np.int64)]),
+        np.concatenate([salaries[one_rows] for one_rows, _, _, _, salaries in unlocked] + [np.empty(0)]),
+        size
+    )
+    
+    def pair_median(skills):
+        wanted = np.zeros(size, dtype=bool)
+        wanted[skills] = True
+        unlocked_salaries = []
+        for one_rows, one_codes, two_rows, two_codes, salaries in unlocked:
+            rows = np.union1d(
+                one_rows[wanted[one_codes]],
+                np.flatnonzero(np.bincount(two_rows[wanted[two_codes]], minlength=len(salaries)) == 2)
+            )
+            unlocked_salaries.append(salaries[rows])
+        unlocked_salaries = np.concatenate(unlocked_salaries)
+        return float(np.nanmedian(unlocked_salaries)) if np.isfinite(unlocked_salaries).any() else np.nan
+    
+    cluster_names = list(cluster_salaries)
+    cluster_histograms = np.stack([cluster_salaries[cluster] for cluster in cluster_names], axis=1) if cluster_names else np.zeros((size, 0, SALARY_BINS), dtype=np.int64)
+    suggestions = []
+    for skills in chosen:
+        skills = list(skills)
+        postings_by_cluster = cluster_histograms[skills].sum(axis=(0, 2))
+        suggestions.append({
+            "skills": " + ".join(vocabulary[code] for code in skills),
+            "num_skills": len(skills),
+            "new_matches": int(single_gains[skills[0]] if len(skills) == 1 else pair_gains[skills[0], skills[1]]),
+            "median_salary": float(single_medians[skills[0]]) if len(skills) == 1 else pair_median(skills),
+            "typical_salary": float(histogram_medians(experience_salaries[skills].sum(axis=0))),
+            "top_cluster": cluster_names[int(np.argmax(postings_by_cluster))] if postings_by_cluster.any() else None
+        })
+    columns = ["skills", "num_skills", "new_matches", "median_salary", "typical_salary", "top_cluster"]
+    return pd.DataFrame(suggestions, columns=columns), matches
+
+# Score jobs against a user profile using the precomputed index
+def score_jobs(jobs_df, user_profile, positions=None):
+    return score_index(get_job_index(jobs_df), user_profile, positions)
+
+# Score the jobs of a JobIndex (or of a shard of one)
+def score_index(index, user_profile, positions=None):
+    trace_count("rows_scanned", index.size if positions is None else len(positions))
+    
+    # Technical skills match (higher weight for technical skills)
+    scores = index.count_matches(index.technical_skills, index.skill_vocabulary, user_profile['skills'], positions) * 3
+    
+    # Personality match
+    scores += index.count_matches(index.traits, index.trait_vocabulary, user_profile['personality'], positions) * 2
+    
+    # Region match
+    scores += index.value_matches(index.regions, index.region_vocabulary, user_profile['preferred_regions'], positions) * 5
+    
+    # Experience level match
+    scores += index.value_matches(index.experience_levels, index.experience_vocabulary, [user_profile['experience_level']], positions) * 4
+    
+    return scores
+
+# Scale turning the precomputed recency terms into the decay of each posting's age
+# on a given day (today by default)
+def recency_factor(today=None):
+    today = pd.Timestamp(today or datetime.now()).normalize()
+    return np.exp2(-(today - ENGAGEMENT_EPOCH).days / ENGAGEMENT_HALF_LIFE_DAYS)
+
+# Weight of each engagement feature for a request, recency scaled to the day
+def engagement_weight_vector(engagement_weights, today=None):
+    weights = np.array([engagement_weights.get(name, DEFAULT_ENGAGEMENT_WEIGHTS[name]) for name in ENGAGEMENT_FEATURES])
+    weights[ENGAGEMENT_FEATURES.index("recency")] *= recency_factor(today)
+    return weights
+
+# Relevance scores blended with the precomputed engagement features in one expression
+def blend_engagement(index, scores, engagement_weights, positions=None, today=None):
+    features = index.engagement if positions is None else index.engagement[positions]
+    relevance_weight = engagement_weights.get("relevance", DEFAULT_ENGAGEMENT_WEIGHTS["relevance"])
+    return relevance_weight * scores + features @ engagement_weight_vector(engagement_weights, today)
+
 # Recommendation function
 def recommend_jobs(jobs_df, user_profile):
     """
@@ -207,49 +1020,1052 @@ def recommend_jobs(jobs_df, user_profile):
     DataFrame with recommended jobs sorted by relevance score
     """
     # Create a copy of the jobs dataframe
-    results = jobs_df.copy()
+    with trace_span("decode", rows=len(jobs_df)):
+        results = decode_list_columns(jobs_df.copy())
     
     # Calculate relevance scores
-    results['relevance_score'] = 0
-    
-    # Score based on skills match
-    for idx, job in results.iterrows():
-        # Technical skills match
-        tech_skills = job['technical_skills'].split(', ') if not pd.isna(job['technical_skills']) else []
-        skill_match = sum(skill in tech_skills for skill in user_profile['skills'])
-        results.at[idx, 'relevance_score'] += skill_match * 3  # Higher weight for technical skills
-        
-        # Personality match
-        personality_traits = job['preferred_traits'].split(', ') if not pd.isna(job['preferred_traits']) else []
-        trait_match = sum(trait in personality_traits for trait in user_profile['personality'])
-        results.at[idx, 'relevance_score'] += trait_match * 2
-        
-        # Region match
-        if job['region'] in user_profile['preferred_regions']:
-            results.at[idx, 'relevance_score'] += 5
-            
-        # Experience level match
-        if job['experience_level'] == user_profile['experience_level']:
-            results.at[idx, 'relevance_score'] += 4
+    with trace_span("score", rows=len(jobs_df)):
+        results['relevance_score'] = score_jobs(jobs_df, user_profile)
     
-    # Sort by relevance score
-    results = results.sort_values(by='relevance_score', ascending=False)
+    # Sort by relevance score, keeping posting order among equal scores
+    with trace_span("sort", rows=len(jobs_df)):
+        results = results.sort_values(by='relevance_score', ascending=False, kind='stable')
     
+    trace_count("rows_returned", len(results))
     return results
 
+# Mask of the jobs that pass the additional filters
+def filter_mask(jobs_df, work_arrangements=None, min_salary=None):
+    return filter_index(get_job_index(jobs_df), work_arrangements, min_salary)
+
+# Filter the jobs of a JobIndex (or of a shard of one)
+def filter_index(index, work_arrangements=None, min_salary=None):
+    trace_count("rows_filtered", index.size)
+    keep = np.ones(index.size, dtype=bool)
+    if work_arrangements:
+        keep &= index.value_matches(index.work_arrangements, index.work_arrangement_vocabulary, work_arrangements).astype(bool)
+    if min_salary is not None:
+        keep &= index.salaries >= min_salary
+    return keep
+
+# Pick the k best scores, breaking ties by posting position
+def select_top_positions(positions, scores, k=None):
+    """
+    Select the highest scoring positions
+    
+    Parameters:
+    positions - array of row positions
+    scores - array of scores aligned with positions
+    k - number of positions to keep, or None to rank all of them
+    
+    Returns:
+    (positions, scores) ordered by descending score, then ascending position
+    """
+    if k is not None and k <= 0:
+        return positions[:0], scores[:0]
+    if k is not None and k < len(scores):
+        # Partial selection: everything above the k-th best score is kept,
+        # ties at that score are resolved by position
+        threshold = np.partition(scores, len(scores) - k)[len(scores) - k]
+        above = np.flatnonzero(scores > threshold)
+        tied = np.flatnonzero(scores == threshold)
+        tied = tied[np.argsort(positions[tied], kind='stable')][:k - len(above)]
+        chosen = np.concatenate([above, tied])
+        positions, scores = positions[chosen], scores[chosen]
+    
+    order = np.lexsort((positions, -scores))
+    return positions[order], scores[order]
+
+# Rank the top jobs, scoring only the candidates the inverted index allows
+def rank_top_positions(jobs_df, user_profile, k=10, work_arrangements=None, min_salary=None, engagement_weights=None):
+    """
+    Rank the top jobs for a profile using the inverted index to skip rows
+    
+    With engagement_weights (see DEFAULT_ENGAGEMENT_WEIGHTS), jobs are ranked on
+    the relevance score blended with the engagement features as of today, and the
+    returned scores are the blended ones.
+    
+    Returns:
+    (positions, scores, number of jobs passing the filters, number of jobs scored)
+    
+    Raises ValueError if k is negative; k = 0 ranks nothing but still counts the matches.
+    """
+    if k is not None and k < 0:
+        raise ValueError(f"k must be 0 or more, got {k}")
+    index = get_job_index(jobs_df)
+    today = datetime.now()
+    
+    # Scores the jobs are ranked on
+    def ranking_scores(positions):
+        scores = score_jobs(jobs_df, user_profile, positions)
+        return scores if engagement_weights is None else blend_engagement(index, scores, engagement_weights, positions, today)
+    
+    # Apply the filters before scoring so filtered-out jobs are never scored
+    keep = filter_mask(jobs_df, work_arrangements, min_salary)
+    num_matches = int(keep.sum())
+    if k == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), num_matches, 0
+    
+    if k is not None:
+        # Jobs sharing a skill with the profile are usually enough: everything else
+        # can score at most the trait, region and experience weights combined (plus
+        # the largest possible engagement bonus)
+        candidates = index.mark_postings(np.zeros(index.size, dtype=bool), index.skill_postings, index.skill_vocabulary, user_profile['skills'])
+        positions = np.flatnonzero(candidates & keep)
+        scores = ranking_scores(positions)
+        best_without_skills = len(user_profile['personality']) * 2 + 5 + 4
+        if engagement_weights is not None:
+            best_bonus = float(np.maximum(engagement_weight_vector(engagement_weights, today), 0) @ index.engagement_max)
+            relevance_weight = engagement_weights.get("relevance", DEFAULT_ENGAGEMENT_WEIGHTS["relevance"])
+            best_without_skills = max(0, relevance_weight * best_without_skills) + best_bonus
+        if len(positions) >= k and np.partition(scores, len(scores) - k)[len(scores) - k] > best_without_skills:
+            return (*select_top_positions(positions, scores, k), num_matches, len(positions))
+        
+        # Exact fallback: region or experience alone may reach the top, so score every
+        # job with any positive term; jobs outside these posting lists all score 0
+        # (which no longer holds once engagement counts)
+        if engagement_weights is None:
+            candidates = index.mark_postings(candidates, index.trait_postings, index.trait_vocabulary, user_profile['personality'])
+            candidates = index.mark_postings(candidates, index.region_postings, index.region_vocabulary, user_profile['preferred_regions'])
+            candidates = index.mark_postings(candidates, index.experience_postings, index.experience_vocabulary, [user_profile['experience_level']])
+            positions = np.flatnonzero(candidates & keep)
+            if len(positions) >= k:
+                scores = ranking_scores(positions)
+                return (*select_top_positions(positions, scores, k), num_matches, len(positions))
+    
+    # Not enough candidates (or every job requested): score all filtered jobs
+    positions = np.flatnonzero(keep)
+    scores = ranking_scores(positions)
+    return (*select_top_positions(positions, scores, k), num_matches, len(positions))
+
+# Weight of the semantic similarity (between 0 and 1) against the weighted match score
+SEMANTIC_WEIGHT = 10.0
+
+# Postings taken from the semantic index and from the exact ranking before blending
+SEMANTIC_CANDIDATES = 200
+
+# Text embedded for the semantic index: title, skills, traits and description of every job
+def semantic_texts(jobs_df):
+    parts = []
+    for column in ['title', 'technical_skills', 'preferred_traits', 'job_description']:
+        if column not in jobs_df:
+            continue
+        if column in LIST_VOCABULARIES and isinstance(jobs_df[column].dtype, pd.ArrowDtype):
+            # Join the item names in Arrow rather than decoding to Python strings
+            rows, codes, vocabulary = encode_list_codes(jobs_df[column], list_vocabulary(jobs_df, column))
+            offsets = np.searchsorted(rows, np.arange(len(jobs_df) + 1)).astype(np.int32)
+            items = pa.ListArray.from_arrays(pa.array(offsets), pa.array(vocabulary, type=pa.string()).take(pa.array(codes)))
+            parts.append(pc.binary_join(items, ", "))
+        else:
+            values = pa.array(jobs_df[column].astype(object).where(jobs_df[column].notna(), ""), type=pa.string())
+            parts.append(values)
+    return pc.binary_join_element_wise(*parts, ". ")
+
+# Query text for a profile: its skills and traits, plus any free-text description
+def profile_text(user_profile, query=""):
+    return ". ".join([", ".join(user_profile['skills']), ", ".join(user_profile['personality']), query or ""])
+
+def rank_semantic_positions(jobs_df, semantic_index, user_profile, query="", work_arrangements=None, min_salary=None, semantic_weight=SEMANTIC_WEIGHT, num_candidates=SEMANTIC_CANDIDATES):
+    """
+    Rank jobs on the weighted match score blended with semantic similarity
+    
+    Candidates are the matching postings most similar to the profile text in the
+    semantic index plus the exact top postings, so a job can be found through
+    either; only candidates are ranked (see JobStore.recommend_semantic_cursor
+    for the other matching postings).
+    
+    Returns:
+    (positions best first, weighted match scores, blended scores)
+    """
+    text = profile_text(user_profile, query)
+    similarities = semantic_index.similarities(text)
+    similar = np.flatnonzero(filter_mask(jobs_df, work_arrangements, min_salary) & (similarities > 0))
+    similar, _ = select_top_positions(similar, similarities[similar], num_candidates)
+    exact, _, _, _ = rank_top_positions(jobs_df, user_profile, num_candidates, work_arrangements, min_salary)
+    positions = np.union1d(similar, exact)
+    
+    scores = score_jobs(jobs_df, user_profile, positions)
+    blended = scores + semantic_weight * similarities[positions]
+    order = np.lexsort((positions, -blended))
+    return positions[order], scores[order], blended[order]
+
+# Top-K recommendation function
+def recommend_top_jobs(jobs_df, user_profile, k=10, work_arrangements=None, min_salary=None, engagement_weights=None):
+    """
+    Top-K recommendation function
+    
+    Parameters:
+    jobs_df - DataFrame with job postings
+    user_profile - Dictionary with user information (see recommend_jobs)
+    k - number of jobs to return (0 for none, only counting the matches), or None
+        for every matching job
+    work_arrangements - optional list of accepted work arrangements
+    min_salary - optional minimum salary
+    engagement_weights - optional weights to rank on relevance blended with
+                         engagement and freshness; weights left out take their
+                         DEFAULT_ENGAGEMENT_WEIGHTS value ({} for all of them),
+                         while None ranks on relevance alone
+    
+    Returns:
+    (DataFrame with the top k jobs sorted by relevance score, or by ranking_score
+    with engagement_weights, number of jobs passing the filters)
+    """
+    top_positions, top_scores, num_matches, _ = rank_top_positions(jobs_df, user_profile, k, work_arrangements, min_salary, engagement_weights)
+    results = decode_list_columns(jobs_df.iloc[top_positions].copy())
+    if engagement_weights is None:
+        results['relevance_score'] = top_scores
+    else:
+        results['relevance_score'] = score_jobs(jobs_df, user_profile, top_positions)
+        results['ranking_score'] = top_scores
+    trace_count("rows_returned", len(results))
+    
+    return results, num_matches
+
+# Cheap identity of a file on disk: modification time and size
+def file_fingerprint(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+# Content hash of a file, read in blocks
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+# Binary columnar snapshot stored next to the CSV
+def snapshot_path(csv_file):
+    return os.path.splitext(csv_file)[0] + ".parquet"
+
+# Directory of the semantic index next to the CSV file
+def semantic_index_path(csv_file):
+    return os.path.splitext(csv_file)[0] + ".semantic"
+
+def load_semantic_index(directory, jobs_df, chunk_size=100000):
+    """
+    Open the semantic index of a dataset, memory-mapped, building it first if needed
+    
+    The index is rebuilt when it is missing or was built from another version of
+    the data (compared by the SHA-256 the dataset was loaded with).
+    """
+    # Only free-text searches need it, so it is imported on first use
+    from semantic import SemanticIndex
+    
+    source = jobs_df.attrs.get("source", {}).get("sha256")
+    semantic_index = SemanticIndex.load(directory)
+    if semantic_index is not None and semantic_index.metadata.get("source") == source and len(semantic_index) == len(jobs_df):
+        return semantic_index
+    
+    text_chunks = lambda: (semantic_texts(jobs_df.iloc[start:start + chunk_size]) for start in range(0, len(jobs_df), chunk_size))
+    SemanticIndex.build(text_chunks, metadata={"source": source}).save(directory)
+    return SemanticIndex.load(directory)
+
+# Whether a snapshot was built from the CSV as it is now
+def snapshot_is_current(csv_file, snapshot):
+    """
+    The snapshot records the fingerprint and hash of the CSV it was built from.
+    It is current when the fingerprint matches, or when the file was touched but
+    its hash is unchanged.
+    """
+    if not os.path.exists(snapshot):
+        return False
+    source = snapshot_attrs(pq.read_schema(snapshot)).get("source", {})
+    if source.get("schema_version") != SCHEMA_VERSION:
+        return False
+    if (source.get("mtime_ns"), source.get("size")) == file_fingerprint(csv_file):
+        return True
+    return source.get("sha256") == file_hash(csv_file)
+
+# Load the postings, preferring a snapshot that matches the CSV
+def load_job_data(csv_file):
+    """
+    Load job postings from a CSV file through its Parquet snapshot
+    
+    A current snapshot is read directly; otherwise the CSV is parsed and the
+    snapshot rewritten. Either way the result uses the compact schema (see
+    apply_job_schema).
+    """
+    snapshot = snapshot_path(csv_file)
+    if snapshot_is_current(csv_file, snapshot):
+        with trace_span("read_snapshot"):
+            return read_job_snapshot(snapshot)
+    
+    mtime_ns, size = file_fingerprint(csv_file)
+    with trace_span("parse_csv"):
+        jobs_df = apply_job_schema(pd.read_csv(csv_file))
+    jobs_df.attrs["source"] = {
+        "schema_version": SCHEMA_VERSION,
+        "mtime_ns": mtime_ns,
+        "size": size,
+        "sha256": file_hash(csv_file)
+    }
+    # Small row groups let the snapshot be streamed in bounded memory
+    with trace_span("write_snapshot"):
+        jobs_df.to_parquet(snapshot, index=False, row_group_size=SNAPSHOT_ROW_GROUP_SIZE)
+    return jobs_df
+
+# Read the postings in fixed-size chunks, from the snapshot when it is current
+def iter_job_data(csv_file, chunk_size=100000):
+    snapshot = snapshot_path(csv_file)
+    if snapshot_is_current(csv_file, snapshot):
+        parquet_file = pq.ParquetFile(snapshot)
+        attrs = snapshot_attrs(parquet_file.schema_arrow)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield arrow_to_job_frame(batch, attrs)
+    else:
+        for chunk in pd.read_csv(csv_file, chunksize=chunk_size):
+            yield apply_job_schema(chunk)
+
+# Loaded dataset and index, shared by all reruns and sessions until the CSV changes.
+# cache_resource hands back the same frame instead of unpickling a copy per rerun,
+# which also keeps the frame's JobIndex alive with it.
+@st.cache_resource(show_spinner=False, max_entries=1)
+def load_cached_job_data(csv_file, mtime_ns, size):
+    jobs_df = load_job_data(csv_file)
+    
+    # Build the skill and trait index and the analytics once per loaded dataset
+    get_job_index(jobs_df)
+    get_job_aggregates(jobs_df)
+    return jobs_df
+
+# Out-of-core top-K recommendation function
+def recommend_top_jobs_streaming(job_chunks, user_profile, k=10, work_arrangements=None, min_salary=None):
+    """
+    Top-K recommendation over a stream of postings frames
+    
+    Each chunk is indexed and ranked on its own, and its best k rows are merged
+    into a running top k, so memory stays bounded by one chunk plus k rows.
+    Positions count across chunks, so ties resolve exactly as in recommend_top_jobs
+    on the concatenated data.
+    
+    Returns:
+    (DataFrame with the top k jobs sorted by relevance score, number of jobs passing the filters)
+    """
+    best_positions = np.empty(0, dtype=np.int64)
+    best_scores = np.empty(0, dtype=np.int64)
+    best_rows = []
+    num_matches = 0
+    offset = 0
+    
+    for chunk in job_chunks:
+        positions, scores, chunk_matches, _ = rank_top_positions(chunk, user_profile, k, work_arrangements, min_salary)
+        rows = decode_list_columns(chunk.iloc[positions].copy())
+        
+        # Merge the chunk's top k into the running top k
+        candidates = np.concatenate([best_positions, positions + offset])
+        candidate_scores = np.concatenate([best_scores, scores])
+        candidate_rows = pd.concat(best_rows + [rows], ignore_index=True)
+        best_positions, best_scores = select_top_positions(candidates, candidate_scores, k)
+        keep = pd.Index(candidates).get_indexer(best_positions)
+        best_rows = [candidate_rows.iloc[keep]]
+        
+        num_matches += chunk_matches
+        offset += len(chunk)
+    
+    results = pd.concat(best_rows) if best_rows else pd.DataFrame()
+    results.index = best_positions
+    results['relevance_score'] = best_scores
+    return results, num_matches
+
+# Index arrays read by scoring, and their vocabularies, shared with worker processes
+SHARED_INDEX_ARRAYS = ["technical_skills", "traits", "regions", "experience_levels", "work_arrangements", "salaries"]
+SHARED_INDEX_VOCABULARIES = ["skill_vocabulary", "trait_vocabulary", "region_vocabulary", "experience_vocabulary", "work_arrangement_vocabulary"]
+
+# Copy the scoring arrays of an index into shared memory, once per index
+def share_job_index(index):
+    """
+    Return a picklable description of the index's scoring arrays in shared memory
+    
+    The blocks are created on first use and unlinked when the index is collected,
+    so worker processes attach to them instead of receiving a pickled frame.
+    """
+    # The parallel path is the only user, so it is imported on first use
+    from multiprocessing import shared_memory
+    
+    if getattr(index, "shared_spec", None) is None:
+        blocks = []
+        arrays = {}
+        for name in SHARED_INDEX_ARRAYS:
+            array = np.ascontiguousarray(getattr(index, name))
+            block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+            blocks.append(block)
+            arrays[name] = (block.name, array.shape, array.dtype.str)
+        index.shared_spec = {
+            "size": index.size,
+            "arrays": arrays,
+            "vocabularies": {name: getattr(index, name) for name in SHARED_INDEX_VOCABULARIES}
+        }
+        weakref.finalize(index, release_shared_blocks, blocks)
+    return index.shared_spec
+
+def release_shared_blocks(blocks):
+    for block in blocks:
+        block.close()
+        block.unlink()
+
+# Shared-memory indexes attached in this (worker) process, by block names; only the
+# latest is kept, as a new spec means the parent shared another index
+_ATTACHED_INDEXES = {}
+
+# Rebuild a JobIndex view over shared memory, or over a slice of one
+def attach_job_index(spec, start=0, stop=None):
+    from multiprocessing import shared_memory
+    
+    key = tuple(name for name, _, _ in spec["arrays"].values())
+    if key not in _ATTACHED_INDEXES:
+        # Detach from the blocks of earlier indexes, so their memory can be freed once unlinked
+        for blocks in _ATTACHED_INDEXES.values():
+            for block in blocks.values():
+                block.close()
+        _ATTACHED_INDEXES.clear()
+        blocks = {name: shared_memory.SharedMemory(name=block_name) for name, (block_name, _, _) in spec["arrays"].items()}
+        _ATTACHED_INDEXES[key] = blocks
+    blocks = _ATTACHED_INDEXES[key]
+    
+    stop = spec["size"] if stop is None else stop
+    index = JobIndex.__new__(JobIndex)
+    index.size = stop - start
+    for name, (_, shape, dtype) in spec["arrays"].items():
+        setattr(index, name, np.ndarray(shape, np.dtype(dtype), buffer=blocks[name].buf)[start:stop])
+    for name, vocabulary in spec["vocabularies"].items():
+        setattr(index, name, vocabulary)
+    return index
+
+# Worker task: filter, score and select the top k of one shard
+def rank_shard(spec, start, stop, user_profile, k, work_arrangements, min_salary):
+    shard = attach_job_index(spec, start, stop)
+    positions = np.flatnonzero(filter_index(shard, work_arrangements, min_salary))
+    scores = score_index(shard, user_profile, positions)
+    return (*select_top_positions(positions + start, scores, k), len(positions))
+
+# One process pool per worker count, reused across requests
+_WORKER_POOLS = {}
+
+def get_worker_pool(workers):
+    # The parallel path is the only user, so it is imported on first use
+    from concurrent.futures import ProcessPoolExecutor
+    
+    if workers not in _WORKER_POOLS:
+        if not _WORKER_POOLS:
+            atexit.register(shutdown_worker_pools)
+        _WORKER_POOLS[workers] = ProcessPoolExecutor(max_workers=workers)
+    return _WORKER_POOLS[workers]
+
+# Stop the worker processes of every pool; run at exit
+def shutdown_worker_pools():
+    while _WORKER_POOLS:
+        _, pool = _WORKER_POOLS.popitem()
+        pool.shutdown(cancel_futures=True)
+
+# Multi-core top-K recommendation function
+def recommend_top_jobs_parallel(jobs_df, user_profile, k=10, work_arrangements=None, min_salary=None, workers=4):
+    """
+    Top-K recommendation scored in parallel over shards of the postings
+    
+    The index is shared with a pool of worker processes through shared memory;
+    each worker ranks one contiguous shard and the per-shard top k lists are merged.
+    
+    Returns:
+    (DataFrame with the top k jobs sorted by relevance score, number of jobs passing the filters)
+    """
+    index = get_job_index(jobs_df)
+    spec = share_job_index(index)
+    bounds = np.linspace(0, index.size, workers + 1).astype(np.int64)
+    
+    pool = get_worker_pool(workers)
+    futures = [
+        pool.submit(rank_shard, spec, start, stop, user_profile, k, work_arrangements, min_salary)
+        for start, stop in zip(bounds[:-1], bounds[1:])
+    ]
+    shards = [future.result() for future in futures]
+    
+    # Merge the per-shard top k lists
+    positions = np.concatenate([shard[0] for shard in shards])
+    scores = np.concatenate([shard[1] for shard in shards])
+    top_positions, top_scores = select_top_positions(positions, scores, k)
+    
+    results = decode_list_columns(jobs_df.iloc[top_positions].copy())
+    results['relevance_score'] = top_scores
+    return results, sum(shard[2] for shard in shards)
+
+# Dense 0/1 feature rows of some jobs, in the column order of profile_weights
+def job_feature_block(index, positions):
+    features = []
+    for bits, vocabulary in [(index.technical_skills, index.skill_vocabulary), (index.traits, index.trait_vocabulary)]:
+        words = bits[positions]
+        codes = np.arange(len(vocabulary))
+        features.append((words[:, codes // 64] >> (codes % 64).astype(np.uint64)) & np.uint64(1))
+    for codes, vocabulary in [(index.regions, index.region_vocabulary), (index.experience_levels, index.experience_vocabulary)]:
+        features.append(codes[positions][:, None] == np.arange(len(vocabulary)))
+    return np.hstack([feature.astype(np.float32) for feature in features])
+
+# Weight matrix of many profiles, one row per profile, matching job_feature_block
+def profile_weights(index, user_profiles):
+    sections = [
+        (index.skill_vocabulary, 'skills', 3, True),
+        (index.trait_vocabulary, 'personality', 2, True),
+        (index.region_vocabulary, 'preferred_regions', 5, False),
+        (index.experience_vocabulary, 'experience_level', 4, False)
+    ]
+    weights = np.zeros((len(user_profiles), sum(len(section[0]) for section in sections)), dtype=np.float32)
+    offset = 0
+    for vocabulary, key, weight, repeats_count in sections:
+        lookup = {item: code for code, item in enumerate(vocabulary)}
+        for row, user_profile in enumerate(user_profiles):
+            items = user_profile[key] if key != 'experience_level' else [user_profile[key]]
+            for item in items:
+                if item in lookup:
+                    # Repeated skills or traits count again; regions and experience match once
+                    if repeats_count:
+                        weights[row, offset + lookup[item]] += weight
+                    else:
+                        weights[row, offset + lookup[item]] = weight
+        offset += len(vocabulary)
+    return weights
+
+# Batch recommendation function
+def recommend_jobs_batch(jobs_df, user_profiles, k=10, work_arrangements=None, min_salary=None, profile_block=256, job_block=65536):
+    """
+    Top-K job ids for many user profiles in one pass over the postings
+    
+    Profiles are encoded as a weight matrix and jobs as 0/1 feature rows (skills,
+    traits, region, experience), so every score in a block is one matrix product.
+    Memory is bounded by profile_block x job_block scores plus the running top k.
+    
+    Returns:
+    (job_ids, scores): one array per profile, ordered like recommend_top_jobs
+    """
+    index = get_job_index(jobs_df)
+    positions = np.flatnonzero(filter_index(index, work_arrangements, min_salary))
+    weights = profile_weights(index, user_profiles)
+    
+    # Score and position packed into one sortable key: higher score first, then lower position
+    base = np.int64(index.size + 1)
+    best_keys = np.full((len(user_profiles), k), -1, dtype=np.int64)
+    
+    for job_start in range(0, len(positions), job_block):
+        block_positions = positions[job_start:job_start + job_block]
+        features = job_feature_block(index, block_positions)
+        for profile_start in range(0, len(user_profiles), profile_block):
+            rows = slice(profile_start, profile_start + profile_block)
+            scores = (weights[rows] @ features.T).astype(np.int64)
+            keys = np.hstack([best_keys[rows], scores * base + (index.size - block_positions)])
+            if keys.shape[1] > k:
+                keys = np.take_along_axis(keys, np.argpartition(-keys, k - 1, axis=1)[:, :k], axis=1)
+            best_keys[rows] = keys
+    
+    best_keys = -np.sort(-best_keys, axis=1)
+    job_id_column = jobs_df['job_id'].to_numpy()
+    job_ids = []
+    scores = []
+    for keys in best_keys:
+        keys = keys[keys >= 0]
+        job_ids.append(job_id_column[index.size - keys % base])
+        scores.append(keys // base)
+    return job_ids, scores
+
 # Check if CSV exists, if not generate it
-def get_job_data():
+def get_job_data(chunk_size=None):
+    """
+    Load the job postings
+    
+    With chunk_size set, returns an iterator over compact frames of at most
+    chunk_size postings instead of loading (and caching) the whole dataset.
+    """
     csv_file = "career_job_postings.csv"
     if not os.path.exists(csv_file):
         job_postings = generate_job_postings(NUM_JOBS)
         jobs_df = pd.DataFrame(job_postings)
         jobs_df.to_csv(csv_file, index=False)
-        return jobs_df
-    else:
-        return pd.read_csv(csv_file)
+    
+    if chunk_size is not None:
+        return iter_job_data(csv_file, chunk_size)
+    with trace_span("get_job_data"):
+        return load_cached_job_data(csv_file, *file_fingerprint(csv_file))
+
+# Canonical form of a profile: order-free, but repeated skills and traits still count
+def canonical_profile(user_profile):
+    return (
+        tuple(sorted(user_profile['skills'])),
+        tuple(sorted(user_profile['personality'])),
+        tuple(sorted(set(user_profile['preferred_regions']))),
+        user_profile['experience_level']
+    )
+
+# Memory the cached rankings of a store may take, in bytes
+RANKING_CACHE_BYTES = 64 * 1024 * 1024
+
+# Bytes held by a cached ranking (a tuple of arrays)
+def ranking_nbytes(ranking):
+    return sum(array.nbytes for array in ranking)
+
+class RecommendationCache:
+    """
+    Bounded LRU cache of full rankings, keyed on dataset version and canonical profile
+    
+    A full ranking takes 8 bytes per posting, so besides maxsize entries the
+    cache holds at most max_bytes; a ranking larger than that is not kept.
+    """
+    
+    def __init__(self, maxsize=64, max_bytes=RANKING_CACHE_BYTES):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+    
+    def get(self, version, user_profile, rank, variant=None):
+        """Return the cached ranking, calling rank(user_profile) on a miss; variant tells ranking modes apart"""
+        key = (version, canonical_profile(user_profile), variant)
+        with self.lock:
+            if key in self.entries:
+                self.hits += 1
+                trace_count("ranking_cache_hits")
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            self.misses += 1
+        trace_count("ranking_cache_misses")
+        
+        ranking = rank(user_profile)
+        if ranking_nbytes(ranking) > self.max_bytes:
+            return ranking
+        with self.lock:
+            # Rankings of older dataset versions can never be hit again
+            for stale in [entry for entry in self.entries if entry[0] != version]:
+                self.nbytes -= ranking_nbytes(self.entries.pop(stale))
+            if key in self.entries:
+                # Ranked meanwhile by another thread
+                self.nbytes -= ranking_nbytes(self.entries.pop(key))
+            self.entries[key] = ranking
+            self.nbytes += ranking_nbytes(ranking)
+            while self.entries and (len(self.entries) > self.maxsize or self.nbytes > self.max_bytes):
+                self.nbytes -= ranking_nbytes(self.entries.popitem(last=False)[1])
+        return ranking
+    
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries), "bytes": self.nbytes}
+
+# Job cards shown per page of results
+RESULTS_PAGE_SIZE = 10
+
+# Directory of appended posting segments, layered on top of the CSV dataset
+SEGMENT_DIRECTORY = "career_job_segments"
+
+# Appended segments with fewer postings than this count as small
+SMALL_SEGMENT_ROWS = 10000
+
+# Small segments allowed before an append merges them into one
+MAX_SMALL_SEGMENTS = 8
+
+# Columns an appended posting needs to be scored, filtered and counted in the analytics
+SEGMENT_COLUMNS = [
+    'job_id', 'career_cluster', 'technical_skills', 'soft_skills', 'preferred_traits',
+    'region', 'experience_level', 'work_arrangement', 'salary'
+]
+
+# Lock file of a segment directory, shared by every process using the store
+STORE_LOCK_FILE = "store.lock"
+
+@contextmanager
+def directory_lock(directory, shared=False):
+    """
+    Lock a store directory against other processes
+    
+    Readers of the segment files take the lock shared; appends and compactions take
+    it exclusive. Threads of one process are kept apart by JobStore.lock instead, and
+    must not nest this lock. On Windows the lock is always exclusive.
+    """
+    with open(os.path.join(directory, STORE_LOCK_FILE), "a+b") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+class JobStore:
+    """
+    Append-only job postings store
+    
+    A base frame (the loaded CSV dataset) is followed by small immutable Parquet
+    segments named segment-<first>-<last>.parquet after the append sequence numbers
+    they cover. Several processes may share the directory: segment files are only
+    written, removed or read under directory_lock. Each segment is read once and gets its own JobIndex, and the
+    analytics aggregates are updated per segment, so appending never re-reads or
+    re-indexes existing postings. compact() merges the appended segments into one;
+    append() does so for the latest small segments once there are more than
+    MAX_SMALL_SEGMENTS of them, so rankings never span many tiny frames.
+    """
+    
+    def __init__(self, directory, base_df=None):
+        self.directory = directory
+        self.base_df = base_df
+        self.segments = {}
+        self.version = 0
+        self.lock = threading.RLock()
+        self.results = RecommendationCache()
+        self.aggregates = copy.deepcopy(get_job_aggregates(base_df)) if base_df is not None else JobAggregates()
+        self.next_job_id = int(base_df['job_id'].max()) + 1 if base_df is not None and len(base_df) else 1
+        os.makedirs(directory, exist_ok=True)
+        self.refresh()
+    
+    # Sequence ranges of the segment files on disk; compacted files supersede the ones they cover
+    def segment_files(self):
+        ranges = {}
+        for name in os.listdir(self.directory):
+            parts = name[:-len(".parquet")].split("-") if name.endswith(".parquet") else []
+            if len(parts) == 3 and parts[0] == "segment":
+                ranges[(int(parts[1]), int(parts[2]))] = os.path.join(self.directory, name)
+        return {
+            span: path for span, path in ranges.items()
+            if not any(other != span and other[0] <= span[0] and span[1] <= other[1] for other in ranges)
+        }
+    
+    # Pick up segments written since the last refresh (possibly by another process)
+    def refresh(self):
+        with self.lock, directory_lock(self.directory, shared=True):
+            self.load_segments()
+    
+    # Bring the segments in memory in line with the files; the caller holds both locks
+    def load_segments(self):
+        files = self.segment_files()
+        changed = False
+        for span in [span for span in self.segments if span not in files]:
+            self.aggregates.remove(self.segments.pop(span))
+            changed = True
+        for span, path in files.items():
+            if span not in self.segments:
+                self.add_segment(span, read_job_snapshot(path))
+                changed = True
+        if changed:
+            self.version += 1
+    
+    # Build the index and aggregates of a segment; raises if its postings cannot be indexed
+    @staticmethod
+    def index_segment(segment_df):
+        get_job_index(segment_df)
+        get_job_aggregates(segment_df)
+    
+    def add_segment(self, span, segment_df):
+        # Indexed before it is registered, so a failure leaves the store as it was
+        self.index_segment(segment_df)
+        self.segments[span] = segment_df
+        self.aggregates.add(segment_df)
+        if len(segment_df):
+            self.next_job_id = max(self.next_job_id, int(segment_df['job_id'].max()) + 1)
+    
+    def segment_path(self, span):
+        return os.path.join(self.directory, f"segment-{span[0]:06d}-{span[1]:06d}.parquet")
+    
+    # Create a segment file, never overwriting one; readers wait on the directory lock,
+    # so they never see a partial file
+    def write_segment(self, span, segment_df):
+        path = self.segment_path(span)
+        segment_file = open(path, "xb")
+        try:
+            with segment_file:
+                segment_df.to_parquet(segment_file, index=False)
+        except BaseException:
+            os.remove(path)
+            raise
+    
+    # Frames in dataset order: the base frame, then segments by sequence number
+    def frames(self):
+        with self.lock:
+            frames = [self.segments[span] for span in sorted(self.segments)]
+        return frames if self.base_df is None else [self.base_df] + frames
+    
+    def __len__(self):
+        return sum(len(frame) for frame in self.frames())
+    
+    def append(self, postings):
+        """
+        Append a batch of postings (a DataFrame or a list of dicts) as a new segment
+        
+        Postings without a job_id get the next free ids. Returns the segment frame.
+        Raises ValueError if a column of SEGMENT_COLUMNS (other than job_id) is
+        missing; nothing is written unless the postings can be indexed.
+        """
+        segment_df = pd.DataFrame(postings).reset_index(drop=True)
+        if segment_df.empty:
+            return segment_df
+        missing = [column for column in SEGMENT_COLUMNS if column != 'job_id' and column not in segment_df]
+        if missing:
+            raise ValueError(f"Postings are missing the columns: {', '.join(missing)}")
+        with self.lock, directory_lock(self.directory):
+            # Segments appended by other processes decide the next sequence number and ids
+            self.load_segments()
+            if 'job_id' not in segment_df:
+                segment_df.insert(0, 'job_id', np.arange(self.next_job_id, self.next_job_id + len(segment_df)))
+            segment_df = apply_job_schema(segment_df)
+            self.index_segment(segment_df)
+            sequence = max([span[1] for span in self.segments], default=0) + 1
+            self.write_segment((sequence, sequence), segment_df)
+            self.add_segment((sequence, sequence), segment_df)
+            self.version += 1
+            small = self.small_segments()
+            if len(small) > MAX_SMALL_SEGMENTS:
+                self.merge_segments(small)
+        return segment_df
+    
+    # Spans of the latest run of small segments, oldest first
+    def small_segments(self):
+        spans = []
+        for span in sorted(self.segments, reverse=True):
+            if len(self.segments[span]) >= SMALL_SEGMENT_ROWS:
+                break
+            spans.append(span)
+        return spans[::-1]
+    
+    def compact(self, spans=None):
+        """
+        Merge appended segments into a single segment, from the frames in memory
+        
+        spans - consecutive segment spans to merge (default: every segment)
+        """
+        with self.lock, directory_lock(self.directory):
+            self.load_segments()
+            self.merge_segments(sorted(self.segments) if spans is None else [span for span in spans if span in self.segments])
+    
+    # Merge consecutive segments into one file; the caller holds both locks
+    def merge_segments(self, spans):
+        spans = sorted(spans)
+        if len(spans) < 2:
+            return
+        merged = pd.concat([decode_list_columns(self.segments[span].copy()) for span in spans], ignore_index=True)
+        merged = apply_job_schema(merged)
+        get_job_index(merged)
+        span = (spans[0][0], spans[-1][1])
+        self.write_segment(span, merged)
+        for old_span in spans:
+            os.remove(self.segment_path(old_span))
+            del self.segments[old_span]
+        # Same postings, so the aggregates stay as they are
+        self.segments[span] = merged
+        self.version += 1
+    
+    def recommend_top_jobs(self, user_profile, k=10, work_arrangements=None, min_salary=None):
+        """Top-K recommendations over the base frame and every segment (see recommend_top_jobs)"""
+        return recommend_top_jobs_streaming(self.frames(), user_profile, k, work_arrangements, min_salary)
+    
+    # Full ranking as (positions, relevance scores); with engagement_weights the order
+    # follows the blended scores, but the relevance scores are returned
+    def rank_jobs(self, user_profile, frames=None, engagement_weights=None, today=None):
+        positions = []
+        scores = []
+        ranking = []
+        offset = 0
+        for frame in frames or self.frames():
+            positions.append(np.arange(offset, offset + len(frame), dtype=np.int32))
+            scores.append(score_jobs(frame, user_profile).astype(np.int32))
+            if engagement_weights is not None:
+                ranking.append(blend_engagement(get_job_index(frame), scores[-1], engagement_weights, today=today))
+            offset += len(frame)
+        if not positions:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32)
+        positions, scores = np.concatenate(positions), np.concatenate(scores)
+        if engagement_weights is None:
+            return select_top_positions(positions, scores)
+        order = np.lexsort((positions, -np.concatenate(ranking)))
+        return positions[order], scores[order]
+    
+    # Mask over store positions of the postings passing the additional filters
+    def filter_mask(self, work_arrangements=None, min_salary=None, frames=None):
+        masks = [filter_mask(frame, work_arrangements, min_salary) for frame in frames or self.frames()]
+        return np.concatenate(masks) if masks else np.empty(0, dtype=bool)
+    
+    # Decoded rows for store positions, in the given order and indexed by position
+    def rows(self, positions, frames=None):
+        frames = frames or self.frames()
+        offsets = np.cumsum([0] + [len(frame) for frame in frames])
+        owners = np.searchsorted(offsets, positions, side='right') - 1
+        parts = [
+            frames[owner].iloc[positions[owners == owner] - offsets[owner]]
+            for owner in np.unique(owners)
+        ]
+        if not parts:
+            # No rows, but the columns of a page with rows
+            return decode_list_columns(frames[0].iloc[:0].copy()) if frames else pd.DataFrame()
+        rows = pd.concat([decode_list_columns(part.copy()) for part in parts])
+        rows.index = np.concatenate([positions[owners == owner] for owner in np.unique(owners)])
+        return rows.loc[positions]
+    
+    def recommend_cursor(self, user_profile, work_arrangements=None, min_salary=None, engagement_weights=None):
+        """
+        Lazy cursor over every matching posting, best first
+        
+        The full ranking is cached per canonical profile, ranking weights and store
+        version (and day, as freshness decays), and the filters are applied
+        afterwards, so filter variants share one cache entry.
+        """
+        # Use one consistent set of frames even if a segment is appended meanwhile
+        with self.lock:
+            version = self.version
+            frames = self.frames()
+        today = pd.Timestamp.now().normalize()
+        variant = None if engagement_weights is None else (today, tuple(sorted(engagement_weights.items())))
+        with trace_span("rank"):
+            positions, scores = self.results.get(
+                version, user_profile, lambda profile: self.rank_jobs(profile, frames, engagement_weights, today), variant
+            )
+        with trace_span("filter", rows=len(positions)):
+            keep = self.filter_mask(work_arrangements, min_salary, frames)[positions]
+        return RankedCursor(self, frames, positions[keep], scores[keep])
+    
+    def recommend_semantic_cursor(self, semantic_index, user_profile, query="", work_arrangements=None, min_salary=None):
+        """
+        Lazy cursor over every matching posting, semantic candidates first
+        
+        The candidates (see rank_semantic_positions) are ranked with semantic
+        similarity blended in, then every other matching posting follows in the
+        order of recommend_cursor. The semantic index covers the base dataset
+        only, so postings of appended segments are never candidates.
+        """
+        exact = self.recommend_cursor(user_profile, work_arrangements, min_salary)
+        with trace_span("rank_semantic"):
+            positions, scores, _ = rank_semantic_positions(self.base_df, semantic_index, user_profile, query, work_arrangements, min_salary)
+        # Base positions are also store positions, as the base frame comes first
+        rest = ~np.isin(exact.positions, positions)
+        positions = np.concatenate([positions, exact.positions[rest]])
+        scores = np.concatenate([scores, exact.scores[rest]])
+        return RankedCursor(self, exact.frames, positions, scores)
+    
+    def recommend(self, user_profile, k=10, work_arrangements=None, min_salary=None, engagement_weights=None):
+        """Cached top-K recommendations (see recommend_cursor)"""
+        cursor = self.recommend_cursor(user_profile, work_arrangements, min_salary, engagement_weights)
+        return cursor.page(0, k), len(cursor)
+
+class RankedCursor:
+    """Ranked store positions; rows are only fetched and decoded one page at a time"""
+    
+    def __init__(self, store, frames, positions, scores):
+        self.store = store
+        self.frames = frames
+        self.positions = positions
+        self.scores = scores
+    
+    def __len__(self):
+        return len(self.positions)
+    
+    def num_pages(self, page_size=10):
+        return max(1, -(-len(self) // page_size))
+    
+    # Rows of one page (numbered from 0), with their relevance scores
+    def page(self, number, page_size=10):
+        window = slice(number * page_size, (number + 1) * page_size)
+        with trace_span("fetch_page", page=number):
+            results = self.store.rows(self.positions[window], self.frames)
+            results['relevance_score'] = self.scores[window].astype(np.int64)
+        trace_count("rows_returned", len(results))
+        return results
+
+# One semantic index per base dataset, built or memory-mapped once for all sessions
+@st.cache_resource(show_spinner="Building the semantic index...", max_entries=1)
+def load_cached_semantic_index(directory, base_hash, _base_df):
+    return load_semantic_index(directory, _base_df)
+
+def get_semantic_index(store):
+    """Return the memory-mapped semantic index of the base dataset, building it on first use"""
+    with trace_span("get_semantic_index"):
+        return load_cached_semantic_index(
+            semantic_index_path("career_job_postings.csv"),
+            store.base_df.attrs.get("source", {}).get("sha256"),
+            store.base_df
+        )
+
+# Recommendation service (see service.py) used by the app when set, e.g. http://127.0.0.1:8765
+RECOMMENDER_URL = os.environ.get("CAREER_RECOMMENDER_URL")
+
+class RemoteCursor:
+    """
+    Same interface as RankedCursor, with each page fetched from the recommendation service
+    
+    If a page cannot be fetched (network or HTTP error, or a malformed answer),
+    the cursor switches for good to the local cursor the fallback callable
+    returns, and keeps the error in fallback_error. Without a fallback the
+    error is raised.
+    """
+    
+    def __init__(self, url, user_profile, work_arrangements=None, min_salary=None, timeout=10, fallback=None):
+        self.url = url.rstrip("/") + "/recommend"
+        self.request = {**user_profile, "work_arrangements": work_arrangements or [], "min_salary": min_salary}
+        self.timeout = timeout
+        self.pages = {}
+        self.fallback = fallback
+        self.fallback_error = None
+        self.local = None
+        # The first page also tells how many jobs match
+        self.num_matches = 0
+        self.page(0)
+    
+    def __len__(self):
+        return self.num_matches if self.local is None else len(self.local)
+    
+    def num_pages(self, page_size=10):
+        return max(1, -(-len(self) // page_size))
+    
+    def page(self, number, page_size=10):
+        # Only used with a recommendation service, so imported on first use
+        import urllib.request
+        
+        if self.local is not None:
+            return self.local.page(number, page_size)
+        if (number, page_size) not in self.pages:
+            body = json.dumps({**self.request, "k": page_size, "offset": number * page_size}).encode("utf-8")
+            request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+            try:
+                with trace_span("fetch_remote_page", page=number):
+                    with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                        answer = json.load(response)
+                num_matches, jobs = answer["num_matches"], pd.DataFrame(answer["jobs"])
+            except (OSError, ValueError, KeyError, TypeError) as error:
+                if self.fallback is None:
+                    raise
+                self.fallback_error = error
+                self.local = self.fallback()
+                return self.local.page(number, page_size)
+            self.num_matches = num_matches
+            self.pages[number, page_size] = jobs
+        trace_count("rows_returned", len(self.pages[number, page_size]))
+        return self.pages[number, page_size]
+
+# One store per base dataset, shared by all reruns and sessions
+@st.cache_resource(show_spinner=False, max_entries=1)
+def load_job_store(directory, base_hash, _base_df):
+    return JobStore(directory, _base_df)
+
+def get_job_store():
+    """Return the job store over the loaded dataset, with any new segments picked up"""
+    jobs_df = get_job_data()
+    store = load_job_store(SEGMENT_DIRECTORY, jobs_df.attrs.get("source", {}).get("sha256"), jobs_df)
+    with trace_span("refresh_segments"):
+        store.refresh()
+    return store
 
 # Streamlit app
 def main():
+    # The timing panel checkbox is drawn late in the sidebar, but its state is
+    # already in the session state when the run starts
+    if not st.session_state.get("show_timings", False):
+        show_app()
+        return
+    with tracing() as trace:
+        show_app()
+    show_timing_panel(trace)
+
+# Draw the pages of the app
+def show_app():
     st.set_page_config(
         page_title="AI Career Guidance Platform",
         page_icon="🎓",
@@ -262,9 +2078,6 @@ def main():
     # Sidebar for user inputs
     st.sidebar.header("Your Profile")
     
-    # Load job data 
-    jobs_df = get_job_data()
-    
     # Use multiselect to get user skills
     user_skills = st.sidebar.multiselect(
         "Select your technical skills:", 
@@ -296,6 +2109,12 @@ def main():
         help="Select your current experience level"
     )
     
+    # Free-text description, matched semantically against the job descriptions
+    user_query = st.sidebar.text_input(
+        "Describe the work you want (optional):",
+        help="Matched against job descriptions, so related terms and abbreviations like 'ML' count too"
+    )
+    
     # Search button
     search_button = st.sidebar.button("Find Matching Jobs", type="primary")
     
@@ -318,40 +2137,110 @@ def main():
         help="Filter by minimum salary"
     )
     
-    # Show data tab
-    tab1, tab2 = st.tabs(["Job Recommendations", "Data Analytics"])
+    # Ranking mode: relevance alone, or blended with engagement and freshness
+    ranking_mode = st.sidebar.radio(
+        "Rank by:",
+        options=["Relevance", "Relevance, popularity and freshness"],
+        help="Popularity uses each posting's save rate and views per application; freshness favours recent postings"
+    )
+    engagement_weights = None
+    if ranking_mode != "Relevance":
+        with st.sidebar.expander("Ranking weights"):
+            engagement_weights = {"relevance": DEFAULT_ENGAGEMENT_WEIGHTS["relevance"]}
+            for name, label in [("save_rate", "Save rate"), ("views_per_application", "Views per application"), ("recency", "Freshness")]:
+                engagement_weights[name] = st.slider(label, 0.0, 20.0, DEFAULT_ENGAGEMENT_WEIGHTS[name], 0.5)
+    
+    st.sidebar.markdown("---")
+    st.sidebar.checkbox(
+        "Show timing panel",
+        key="show_timings",
+        help="Time data loading, ranking, filtering and rendering for each run"
+    )
     
-    with tab1:
+    # Only the selected section runs: tabs would compute every tab on each rerun.
+    # A new search brings the recommendations back into view
+    if search_button:
+        st.session_state["section"] = "Job Recommendations"
+    section = st.radio(
+        "Section",
+        options=["Job Recommendations", "Data Analytics"],
+        horizontal=True,
+        key="section",
+        label_visibility="collapsed"
+    )
+    
+    if section == "Job Recommendations":
+        # The search is remembered so that paging through results (which reruns the
+        # script) keeps showing them
         if search_button:
             if not user_skills:
+                st.session_state.pop("search", None)
                 st.warning("Please select at least one skill to find matching jobs.")
             else:
-                st.success(f"Finding jobs matching your {len(user_skills)} skills and preferences...")
-                
-                # Create user profile
-                user_profile = {
-                    "skills": user_skills,
-                    "personality": user_personality,
-                    "preferred_regions": user_regions,
-                    "experience_level": user_experience
+                st.session_state["search"] = {
+                    "user_profile": {
+                        "skills": user_skills,
+                        "personality": user_personality,
+                        "preferred_regions": user_regions,
+                        "experience_level": user_experience
+                    },
+                    "query": user_query.strip(),
+                    "work_arrangements": filter_work_arrangement,
+                    "min_salary": min_salary if min_salary > 30000 else None,
+                    "engagement_weights": engagement_weights
                 }
+                st.session_state["results_page"] = 1
+        
+        search = st.session_state.get("search")
+        if search:
+            user_profile = search["user_profile"]
+            
+            # Load job data, including postings appended since the dataset was loaded
+            store = get_job_store()
+            st.success(f"Finding jobs matching your {len(user_profile['skills'])} skills and preferences...")
+            
+            # Get a lazy cursor over the ranked matches, applying additional filters if any;
+            # blended with semantic matching for a free-text description, otherwise from
+            # the recommendation service when one is configured (it ranks on relevance only)
+            local_cursor = lambda: store.recommend_cursor(
+                user_profile,
+                work_arrangements=search["work_arrangements"],
+                min_salary=search["min_salary"],
+                engagement_weights=search.get("engagement_weights")
+            )
+            cursor = None
+            if search.get("query"):
+                cursor = store.recommend_semantic_cursor(
+                    get_semantic_index(store),
+                    user_profile,
+                    search["query"],
+                    work_arrangements=search["work_arrangements"],
+                    min_salary=search["min_salary"]
+                )
+            elif RECOMMENDER_URL and not search.get("engagement_weights"):
+                # Falls back to ranking locally on any page the service fails to return
+                cursor = RemoteCursor(
+                    RECOMMENDER_URL, user_profile, search["work_arrangements"], search["min_salary"], fallback=local_cursor
+                )
+            if cursor is None:
+                cursor = local_cursor()
+            
+            # Display results count
+            if len(cursor) > 0:
+                st.markdown(f"### Found {len(cursor)} matching jobs")
+                page = st.number_input(
+                    f"Page (of {cursor.num_pages(RESULTS_PAGE_SIZE)})",
+                    min_value=1,
+                    max_value=cursor.num_pages(RESULTS_PAGE_SIZE),
+                    key="results_page"
+                )
+                recommendations = cursor.page(page - 1, RESULTS_PAGE_SIZE)
+                if getattr(cursor, "fallback_error", None) is not None:
+                    st.warning(f"Recommendation service unavailable ({cursor.fallback_error}); ranking locally instead.")
                 
-                # Get recommendations
-                recommendations = recommend_jobs(jobs_df, user_profile)
-                
-                # Apply additional filters if any
-                if filter_work_arrangement:
-                    recommendations = recommendations[recommendations['work_arrangement'].isin(filter_work_arrangement)]
-                
-                if min_salary > 30000:
-                    recommendations = recommendations[recommendations['salary'] >= min_salary]
-                
-                # Display results count
-                if len(recommendations) > 0:
-                    st.markdown(f"### Found {len(recommendations)} matching jobs")
-                    
-                    # Display job cards
-                    for i, (_, job) in enumerate(recommendations.head(10).iterrows()):
+                # Display job cards
+                with trace_span("render_cards", cards=len(recommendations)):
+                    for i, (_, job) in enumerate(recommendations.iterrows()):
                         col1, col2 = st.columns([3, 1])
                         
                         with col1:
@@ -374,8 +2263,8 @@ def main():
                             else:
                                 st.markdown("🟠 Fair Match")
                         
-                        # Show expandable job description
-                        with st.expander("View Job Details"):
+                        # Job details are only built for the postings whose toggle is on
+                        if st.toggle("View Job Details", key=f"details_{job['job_id']}"):
                             st.markdown(f"**Education Required:** {job['education_required']}")
                             st.markdown(f"**Soft Skills:** {job['soft_skills']}")
                             st.markdown(f"**Work Arrangement:** {job['work_arrangement']}")
@@ -385,49 +2274,95 @@ def main():
                             st.markdown(job['job_description'])
                         
                         st.markdown("---")
-                else:
-                    st.warning("No jobs match your criteria. Try adjusting your skills or filters.")
-        else:
+            else:
+                st.warning("No jobs match your criteria. Try adjusting your skills or filters.")
+            
+            # Skills that would qualify the profile for the most additional postings,
+            # computed only once asked for
+            if st.toggle("What to learn next", key="skill_gaps"):
+                with trace_span("skill_gaps"):
+                    suggestions, num_qualified = suggest_skills(
+                        store.frames(), user_profile, 5, search["work_arrangements"], search["min_salary"]
+                    )
+                    st.markdown(f"You have at least half the technical skills of **{num_qualified:,}** postings matching your filters.")
+                    columns = {
+                        "skills": "Learn",
+                        "new_matches": "New matches",
+                        "median_salary": "Their median salary ($)",
+                        "typical_salary": "Typical salary at your level ($)",
+                        "top_cluster": "Most in demand in"
+                    }
+                    for num_skills, label in [(1, "One skill"), (2, "Two skills")]:
+                        subset = suggestions[suggestions['num_skills'] == num_skills]
+                        if len(subset):
+                            st.markdown(f"**{label}**")
+                            st.dataframe(subset[list(columns)].rename(columns=columns), hide_index=True, use_container_width=True)
+                    if suggestions.empty:
+                        st.info("No single skill or pair of skills would qualify you for more postings with these filters.")
+        elif not search_button:
             # Initial state
             st.info("👈 Select your skills and preferences, then click 'Find Matching Jobs'")
             st.image("https://via.placeholder.com/800x400?text=AI+Career+Guidance", use_column_width=True)
     
-    with tab2:
-        st.header("Career Data Analytics")
-        
-        # Basic stats about the job market
-        st.subheader("Job Market Overview")
-        
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.metric("Total Job Postings", f"{len(jobs_df):,}")
-        with col2:
-            avg_salary = int(jobs_df['salary'].mean())
-            st.metric("Average Salary", f"${avg_salary:,}")
-        with col3:
-            top_cluster = jobs_df['career_cluster'].value_counts().idxmax()
-            st.metric("Top Career Cluster", top_cluster)
-        
-        # Distribution of jobs by career cluster
-        st.subheader("Jobs by Career Cluster")
-        cluster_counts = jobs_df['career_cluster'].value_counts()
-        st.bar_chart(cluster_counts)
-        
-        # Distribution of jobs by experience level
-        st.subheader("Jobs by Experience Level")
-        experience_counts = jobs_df['experience_level'].value_counts()
-        st.bar_chart(experience_counts)
-        
-        # Top skills in demand
-        st.subheader("Top Skills in Demand")
-        
-        # Parse skills from all job listings
-        all_skills = []
-        for skills_str in jobs_df['technical_skills'].dropna():
-            all_skills.extend([s.strip() for s in skills_str.split(',')])
-        
-        skill_counts = pd.Series(all_skills).value_counts().head(10)
-        st.bar_chart(skill_counts)
+    if section == "Data Analytics":
+        with trace_span("render_analytics"):
+            show_analytics(get_job_store())
+
+# Job market analytics of every posting in the store
+def show_analytics(store):
+    st.header("Career Data Analytics")
+    
+    # Basic stats about the job market
+    st.subheader("Job Market Overview")
+    
+    # Precomputed aggregates: constant time regardless of the number of postings
+    aggregates = store.aggregates
+    cluster_counts = JobAggregates.ranked(aggregates.cluster_counts)
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Total Job Postings", f"{aggregates.count:,}")
+    with col2:
+        avg_salary = int(aggregates.average_salary())
+        st.metric("Average Salary", f"${avg_salary:,}")
+    with col3:
+        top_cluster = cluster_counts.index[0] if len(cluster_counts) else "-"
+        st.metric("Top Career Cluster", top_cluster)
+    
+    # Distribution of jobs by career cluster
+    st.subheader("Jobs by Career Cluster")
+    st.bar_chart(cluster_counts)
+    
+    # Distribution of jobs by experience level
+    st.subheader("Jobs by Experience Level")
+    experience_counts = JobAggregates.ranked(aggregates.experience_counts)
+    st.bar_chart(experience_counts)
+    
+    # Top skills in demand
+    st.subheader("Top Skills in Demand")
+    skill_counts = JobAggregates.ranked(aggregates.skill_counts, 10)
+    st.bar_chart(skill_counts)
+
+# Debug panel with the spans and counters of this run, exportable as JSON lines
+def show_timing_panel(trace):
+    with st.expander("Timing panel", expanded=True):
+        spans = pd.DataFrame([record for record in trace.records() if record["type"] == "span"])
+        if len(spans):
+            spans["name"] = ["  " * depth + name for depth, name in zip(spans["depth"], spans["name"])]
+            st.dataframe(spans.drop(columns=["type", "depth"]), hide_index=True, use_container_width=True)
+        
+        counters = dict(trace.counters)
+        if counters:
+            st.json(counters)
+        if counters.get("rows_scanned"):
+            st.markdown(f"**Rows scanned / returned:** {counters['rows_scanned']:,} / {counters.get('rows_returned', 0):,}")
+        
+        st.download_button(
+            "Export as JSON lines",
+            data=trace.to_json_lines(),
+            file_name="career_guidance_trace.jsonl",
+            mime="application/x-ndjson"
+        )
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,425 @@
+# File: benchmarks.py
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from app import (
+    TECHNICAL_SKILLS, PERSONALITY_TRAITS, REGIONS, EXPERIENCE_LEVELS,
+    JobAggregates, apply_job_schema, generate_job_chunks, generate_job_frame, generate_job_postings,
+    get_job_index, load_job_data, rank_top_positions, recommend_jobs, recommend_top_jobs,
+    recommend_top_jobs_parallel, share_job_index, snapshot_path, write_job_postings
+)
+
+# Dataset sizes the suite runs at by default
+SUITE_SIZES = [1000, 100000, 1000000, 10000000]
+
+# Cases that materialise every posting as Python objects are skipped above these sizes
+SUITE_ROW_LIMITS = {
+    "generate_job_postings": 1000000,
+    "recommend_jobs": 1000000
+}
+
+# Profile like the ones the sidebar produces: 2-5 skills from one career cluster
+def sample_profile(rng):
+    cluster_skills = TECHNICAL_SKILLS[rng.choice(list(TECHNICAL_SKILLS))]
+    return {
+        "skills": rng.sample(cluster_skills, rng.randint(2, 5)),
+        "personality": rng.sample(PERSONALITY_TRAITS, 2),
+        "preferred_regions": rng.sample(REGIONS, 1),
+        "experience_level": rng.choice(EXPERIENCE_LEVELS)
+    }
+
+# How many rows the inverted index lets the top-K recommender skip
+def benchmark_candidate_pruning(num_jobs=100000, num_profiles=200, k=10, seed=0):
+    random.seed(seed)
+    jobs_df = pd.DataFrame(generate_job_postings(num_jobs))
+    get_job_index(jobs_df)
+
+    rng = random.Random(seed)
+    rows_scored = 0
+    start = time.perf_counter()
+    for _ in range(num_profiles):
+        _, _, _, num_scored = rank_top_positions(jobs_df, sample_profile(rng), k)
+        rows_scored += num_scored
+    elapsed = time.perf_counter() - start
+
+    return {
+        "num_jobs": num_jobs,
+        "num_profiles": num_profiles,
+        "rows_scored_per_query": rows_scored / num_profiles,
+        "rows_skipped_fraction": 1 - rows_scored / (num_profiles * num_jobs),
+        "ms_per_query": elapsed / num_profiles * 1000
+    }
+
+# Large compact dataset, built chunk by chunk without the free-text columns
+def generate_compact_dataset(num_jobs, seed=0, chunk_size=500000):
+    chunks = []
+    for chunk in generate_job_chunks(num_jobs, seed, chunk_size):
+        chunks.append(apply_job_schema(chunk.drop(columns=["company_name", "job_description"])))
+    return pd.concat(chunks, ignore_index=True)
+
+# Scoring throughput of the sharded recommender for several worker counts
+def benchmark_parallel_scoring(num_jobs=5000000, worker_counts=(1, 2, 4, 8), num_queries=10, k=10, seed=0):
+    jobs_df = generate_compact_dataset(num_jobs, seed)
+    share_job_index(get_job_index(jobs_df))
+
+    rng = random.Random(seed)
+    profiles = [sample_profile(rng) for _ in range(num_queries)]
+    results = []
+    for workers in worker_counts:
+        # Warm up the pool so process start-up is not measured
+        recommend_top_jobs_parallel(jobs_df, profiles[0], k, workers=workers)
+        start = time.perf_counter()
+        for profile in profiles:
+            recommend_top_jobs_parallel(jobs_df, profile, k, workers=workers)
+        elapsed = time.perf_counter() - start
+        results.append({
+            "workers": workers,
+            "num_jobs": num_jobs,
+            "ms_per_query": elapsed / num_queries * 1000,
+            "rows_per_second": num_jobs * num_queries / elapsed
+        })
+    return results
+
+# Run in a fresh interpreter per startup run: times importing the app, its first run
+# (the welcome page), a rerun, a search, a rerun of the results and the analytics
+# section, and prints the timings in milliseconds as JSON
+STARTUP_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app
+timings = {"import_app": time.perf_counter() - started}
+from streamlit.testing.v1 import AppTest
+session = AppTest.from_file(app.__file__, default_timeout=600)
+steps = [
+    ("first_run", lambda: None),
+    ("rerun", lambda: None),
+    ("search", lambda: (session.sidebar.multiselect[0].select("Python").select("SQL"), session.sidebar.button[0].click())),
+    ("search_rerun", lambda: None),
+    ("analytics", lambda: session.radio(key="section").set_value("Data Analytics"))
+]
+for name, action in steps:
+    action()
+    started = time.perf_counter()
+    session.run()
+    timings[name] = time.perf_counter() - started
+    if session.exception:
+        sys.exit(f"{name}: {session.exception}")
+print(json.dumps({name: seconds * 1000 for name, seconds in timings.items()}))
+"""
+
+def benchmark_startup(repeats=5, app_directory=None):
+    """
+    Cold start and rerun latency of the Streamlit app
+
+    Every run is a fresh interpreter (so imports and Streamlit caches start
+    cold) in the app directory, using its dataset and snapshot as they are.
+
+    Returns:
+    - Dictionary mapping each step of STARTUP_PROBE to its latency percentiles
+    """
+    app_directory = app_directory or os.path.dirname(os.path.abspath(__file__))
+    runs = []
+    for _ in range(repeats):
+        probe = subprocess.run(
+            [sys.executable, "-c", STARTUP_PROBE], cwd=app_directory, capture_output=True, text=True, check=True,
+            env={**os.environ, "PYTHONPATH": app_directory}
+        )
+        runs.append(json.loads(probe.stdout.strip().splitlines()[-1]))
+    return {
+        "repeats": repeats,
+        "latency_ms": {name: latency_summary(np.array([run[name] for run in runs]) / 1000) for name in runs[0]}
+    }
+
+class PeakMemory:
+    """
+    Peak memory allocated over a block, in bytes
+
+    Python and numpy allocations are traced with tracemalloc; pyarrow allocates
+    from its own pool, which is sampled from a background thread. Unlike the
+    resident set size, neither depends on what earlier cases left in the heap.
+    """
+
+    def __init__(self, interval=0.002):
+        self.interval = interval
+        self.peak = 0
+
+    def __enter__(self):
+        gc.collect()
+        self.arrow_baseline = self.arrow_highest = pa.total_allocated_bytes()
+        self.done = threading.Event()
+        self.sampler = threading.Thread(target=self.sample, daemon=True)
+        self.sampler.start()
+        tracemalloc.start()
+        return self
+
+    def sample(self):
+        while not self.done.wait(self.interval):
+            self.arrow_highest = max(self.arrow_highest, pa.total_allocated_bytes())
+
+    def __exit__(self, *exc_info):
+        python_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.done.set()
+        self.sampler.join()
+        self.peak = python_peak + self.arrow_highest - self.arrow_baseline
+
+# Latency percentiles in milliseconds
+def latency_summary(latencies):
+    latencies = np.asarray(latencies) * 1000
+    return {
+        "min": float(latencies.min()),
+        "p50": float(np.percentile(latencies, 50)),
+        "p90": float(np.percentile(latencies, 90)),
+        "p99": float(np.percentile(latencies, 99)),
+        "max": float(latencies.max()),
+        "mean": float(latencies.mean())
+    }
+
+def measure(run, num_jobs, repeats, setup=None):
+    """
+    Time repeated runs of a benchmark case
+
+    Parameters:
+    - run: Callable doing the measured work; its argument is the run number
+    - num_jobs: Postings processed per run, for the throughput
+    - repeats: Number of timed runs
+    - setup: Optional callable run untimed before every run
+
+    Returns:
+    - Dictionary with latency percentiles, throughput and peak memory
+    """
+    # One untimed warm-up run, which is also the one whose memory is measured,
+    # so the sampler does not skew the timings
+    if setup:
+        setup()
+    with PeakMemory() as memory:
+        run(0)
+
+    latencies = []
+    for number in range(repeats):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        run(number)
+        latencies.append(time.perf_counter() - start)
+
+    summary = latency_summary(latencies)
+    return {
+        "repeats": repeats,
+        "latency_ms": summary,
+        "rows_per_second": num_jobs / summary["p50"] * 1000 if summary["p50"] else None,
+        "peak_memory_bytes": memory.peak
+    }
+
+class SuiteDataset:
+    """Seeded postings of one size, written to CSV and loaded lazily for the cases that need them"""
+
+    def __init__(self, directory, num_jobs, seed):
+        self.num_jobs = num_jobs
+        self.seed = seed
+        self.csv_file = os.path.join(directory, f"postings_{num_jobs}.csv")
+        self.jobs_df = None
+        # A fixed date keeps posting dates (and so the files) identical across runs
+        write_job_postings(self.csv_file, num_jobs, seed, today=datetime(2025, 1, 1))
+
+    def frame(self):
+        if self.jobs_df is None:
+            self.jobs_df = load_job_data(self.csv_file)
+        return self.jobs_df
+
+    def profiles(self, count=100):
+        rng = random.Random(self.seed)
+        return [sample_profile(rng) for _ in range(count)]
+
+    def remove_snapshot(self):
+        snapshot = snapshot_path(self.csv_file)
+        if os.path.exists(snapshot):
+            os.remove(snapshot)
+
+    def close(self):
+        self.jobs_df = None
+        self.remove_snapshot()
+        os.remove(self.csv_file)
+
+# Each case maps a dataset to (run, setup) for measure
+def case_generate_job_postings(dataset):
+    def run(number):
+        random.seed(dataset.seed + number)
+        generate_job_postings(dataset.num_jobs)
+    return run, None
+
+def case_generate_job_frame(dataset):
+    def run(number):
+        generate_job_frame(dataset.num_jobs, np.random.default_rng(dataset.seed + number))
+    return run, None
+
+# Parsing the CSV and writing its snapshot, as on the first start of the app
+def case_load_cold(dataset):
+    return lambda number: load_job_data(dataset.csv_file), dataset.remove_snapshot
+
+# Reading the current snapshot, as on every later start
+def case_load_warm(dataset):
+    load_job_data(dataset.csv_file)
+    return lambda number: load_job_data(dataset.csv_file), None
+
+def case_recommend_jobs(dataset):
+    jobs_df, profiles = dataset.frame(), dataset.profiles()
+    return lambda number: recommend_jobs(jobs_df, profiles[number % len(profiles)]), None
+
+def case_recommend_top_jobs(dataset):
+    jobs_df, profiles = dataset.frame(), dataset.profiles()
+    get_job_index(jobs_df)
+    return lambda number: recommend_top_jobs(jobs_df, profiles[number % len(profiles)], 10), None
+
+# The statistics behind the analytics tab, built from scratch
+def case_analytics(dataset):
+    jobs_df = dataset.frame()
+    return lambda number: JobAggregates(jobs_df), None
+
+BENCHMARK_CASES = {
+    "generate_job_postings": case_generate_job_postings,
+    "generate_job_frame": case_generate_job_frame,
+    "load_cold": case_load_cold,
+    "load_warm": case_load_warm,
+    "recommend_jobs": case_recommend_jobs,
+    "recommend_top_jobs": case_recommend_top_jobs,
+    "analytics": case_analytics
+}
+
+# Where and with what the suite ran, so baselines from other machines can be told apart
+def environment_metadata():
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__
+    }
+
+def run_suite(sizes=SUITE_SIZES, cases=None, repeats=5, seed=0, directory=None, log=None):
+    """
+    Run the benchmark cases at every dataset size
+
+    Parameters:
+    - sizes: Dataset sizes (number of postings)
+    - cases: Names from BENCHMARK_CASES, all by default; with none, no dataset is built
+    - repeats: Timed runs per case and size
+    - seed: Seed for the generated postings and profiles
+    - directory: Where the CSV files are written, a temporary directory by default
+    - log: Optional callable receiving each result as it is produced
+
+    Returns:
+    - Dictionary with the environment metadata and one result per case and size
+    """
+    cases = list(BENCHMARK_CASES) if cases is None else cases
+    results = []
+    with tempfile.TemporaryDirectory(dir=directory) as workdir:
+        for num_jobs in sizes if cases else []:
+            dataset = SuiteDataset(workdir, num_jobs, seed)
+            for name in cases:
+                result = {"case": name, "num_jobs": num_jobs}
+                if num_jobs > SUITE_ROW_LIMITS.get(name, num_jobs):
+                    result["skipped"] = f"above the {SUITE_ROW_LIMITS[name]} row limit"
+                else:
+                    run, setup = BENCHMARK_CASES[name](dataset)
+                    result.update(measure(run, num_jobs, repeats, setup))
+                results.append(result)
+                if log:
+                    log(result)
+            dataset.close()
+    return {"metadata": {**environment_metadata(), "seed": seed}, "results": results}
+
+def compare_to_baseline(report, baseline, tolerance=0.25):
+    """
+    Find results that got slower or bigger than in a stored baseline
+
+    Parameters:
+    - report: Output of run_suite
+    - baseline: An earlier output of run_suite
+    - tolerance: Allowed relative increase of the median latency and peak memory
+
+    Returns:
+    - List of regressions, each naming the case, size, metric and both values
+    """
+    previous = {(result["case"], result["num_jobs"]): result for result in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        before = previous.get((result["case"], result["num_jobs"]))
+        if "skipped" in result or before is None or "skipped" in before:
+            continue
+        for metric, current, earlier in [
+            ("latency_p50_ms", result["latency_ms"]["p50"], before["latency_ms"]["p50"]),
+            ("peak_memory_bytes", result["peak_memory_bytes"], before["peak_memory_bytes"])
+        ]:
+            if earlier > 0 and current > earlier * (1 + tolerance):
+                regressions.append({
+                    "case": result["case"],
+                    "num_jobs": result["num_jobs"],
+                    "metric": metric,
+                    "baseline": earlier,
+                    "current": current,
+                    "ratio": current / earlier
+                })
+    return regressions
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the recommendation and data-loading hot paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SUITE_SIZES, help="dataset sizes to run at")
+    parser.add_argument(
+        "--cases", nargs="*", choices=list(BENCHMARK_CASES),
+        help="cases to run (default: all); give none to only run the benchmarks selected below"
+    )
+    parser.add_argument("--repeats", type=int, default=5, help="timed runs per case and size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    parser.add_argument("--baseline", help="JSON report to compare against; exits with status 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown or memory growth")
+    parser.add_argument("--pruning", action="store_true", help="also report candidate pruning on 100K postings")
+    parser.add_argument("--parallel", action="store_true", help="also report sharded scoring on 5M postings")
+    parser.add_argument("--startup", action="store_true", help="also report app cold start and rerun latency")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    progress = lambda result: print(json.dumps(result), file=sys.stderr)
+    report = run_suite(arguments.sizes, arguments.cases, arguments.repeats, arguments.seed, log=progress)
+    if arguments.pruning:
+        report["pruning"] = benchmark_candidate_pruning(seed=arguments.seed)
+    if arguments.parallel:
+        report["parallel"] = benchmark_parallel_scoring(seed=arguments.seed)
+    if arguments.startup:
+        report["startup"] = benchmark_startup(arguments.repeats)
+
+    regressions = []
+    if arguments.baseline:
+        with open(arguments.baseline) as baseline_file:
+            regressions = compare_to_baseline(report, json.load(baseline_file), arguments.tolerance)
+        report["regressions"] = regressions
+
+    if arguments.output:
+        with open(arguments.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    for regression in regressions:
+        print(f"Regression: {regression['case']} at {regression['num_jobs']} postings, "
+              f"{regression['metric']} {regression['baseline']:.1f} -> {regression['current']:.1f}", file=sys.stderr)
+    sys.exit(1 if regressions else 0)
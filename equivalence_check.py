@@ -0,0 +1,389 @@
+# File: equivalence_check.py
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from semantic import SemanticIndex, term_hashes
+from app import (
+    ALL_TECHNICAL_SKILLS, PERSONALITY_TRAITS, REGIONS, EXPERIENCE_LEVELS, WORK_ARRANGEMENTS, ENGAGEMENT_FEATURES, MAX_SMALL_SEGMENTS,
+    JobStore, apply_job_schema, generate_job_postings, get_job_index, iter_job_data, load_job_data, semantic_texts,
+    recommend_jobs, recommend_jobs_batch, recommend_top_jobs, recommend_top_jobs_parallel, recommend_top_jobs_streaming
+)
+
+# Row-by-row scoring of the original recommendation function, kept as the reference
+# ranking. Ties break on posting order (kind='stable'), unlike the original sort, which
+# used the default quicksort and left the order of tied postings arbitrary
+def recommend_jobs_reference(jobs_df, user_profile):
+    results = jobs_df.copy()
+    results['relevance_score'] = 0
+
+    for idx, job in results.iterrows():
+        tech_skills = job['technical_skills'].split(', ') if not pd.isna(job['technical_skills']) else []
+        skill_match = sum(skill in tech_skills for skill in user_profile['skills'])
+        results.at[idx, 'relevance_score'] += skill_match * 3
+
+        personality_traits = job['preferred_traits'].split(', ') if not pd.isna(job['preferred_traits']) else []
+        trait_match = sum(trait in personality_traits for trait in user_profile['personality'])
+        results.at[idx, 'relevance_score'] += trait_match * 2
+
+        if job['region'] in user_profile['preferred_regions']:
+            results.at[idx, 'relevance_score'] += 5
+
+        if job['experience_level'] == user_profile['experience_level']:
+            results.at[idx, 'relevance_score'] += 4
+
+    # Equal scores keep posting order
+    results = results.sort_values(by='relevance_score', ascending=False, kind='stable')
+
+    return results
+
+# Draw a random user profile from the app vocabularies
+def random_profile(rng):
+    skills = rng.sample(ALL_TECHNICAL_SKILLS, rng.randint(1, 6))
+    # Repeated selections count once per repeat in the reference
+    if rng.random() < 0.2:
+        skills.append(skills[0])
+    return {
+        "skills": skills,
+        "personality": rng.sample(PERSONALITY_TRAITS, rng.randint(0, 4)),
+        "preferred_regions": rng.sample(REGIONS, rng.randint(0, 3)),
+        "experience_level": rng.choice(EXPERIENCE_LEVELS)
+    }
+
+# Generate a seeded dataset, including some missing skill and trait lists
+def random_dataset(seed, num_jobs, missing_rate=0.05):
+    random.seed(seed)
+    jobs_df = pd.DataFrame(generate_job_postings(num_jobs))
+    missing = np.random.default_rng(seed).random((2, num_jobs)) < missing_rate
+    jobs_df.loc[missing[0], 'technical_skills'] = np.nan
+    jobs_df.loc[missing[1], 'preferred_traits'] = np.nan
+    return jobs_df
+
+# Check that recommend_jobs scores and ranks exactly like the reference
+def check_equivalence(seed=0, num_jobs=500, num_profiles=20):
+    jobs_df = random_dataset(seed, num_jobs)
+    compact_df = apply_job_schema(jobs_df)
+    rng = random.Random(seed)
+
+    for _ in range(num_profiles):
+        user_profile = random_profile(rng)
+        expected = recommend_jobs_reference(jobs_df, user_profile)
+        actual = recommend_jobs(jobs_df, user_profile)
+        pd.testing.assert_frame_equal(actual, expected)
+
+        # Top-K with filters must equal filtering and truncating the full ranking
+        work_arrangements = rng.sample(WORK_ARRANGEMENTS, rng.randint(0, 2))
+        min_salary = rng.choice([None, 80000, 150000])
+        k = rng.choice([0, 1, 10, 50, None])
+        filtered = expected
+        if work_arrangements:
+            filtered = filtered[filtered['work_arrangement'].isin(work_arrangements)]
+        if min_salary is not None:
+            filtered = filtered[filtered['salary'] >= min_salary]
+        top, num_matches = recommend_top_jobs(jobs_df, user_profile, k, work_arrangements, min_salary)
+        assert num_matches == len(filtered)
+        pd.testing.assert_frame_equal(top, filtered if k is None else filtered.head(k))
+
+        # The compact schema changes dtypes but not the ranking or the decoded lists
+        compact_top, compact_matches = recommend_top_jobs(compact_df, user_profile, k, work_arrangements, min_salary)
+        assert compact_matches == num_matches
+        for column in ['job_id', 'relevance_score', 'technical_skills', 'soft_skills', 'preferred_traits']:
+            assert compact_top[column].tolist() == top[column].tolist(), column
+
+# Check that streaming top-K over CSV and snapshot chunks matches the in-memory path
+def check_streaming(seed=0, num_jobs=500, num_profiles=10, chunk_size=97):
+    jobs_df = random_dataset(seed, num_jobs)
+    rng = random.Random(seed)
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_file = os.path.join(directory, "postings.csv")
+        jobs_df.to_csv(csv_file, index=False)
+        for _ in range(num_profiles):
+            user_profile = random_profile(rng)
+            k = rng.choice([1, 10, 50])
+            expected, expected_matches = recommend_top_jobs(jobs_df, user_profile, k)
+
+            # The first pass streams the CSV, the second the snapshot written in between
+            for _ in range(2):
+                actual, num_matches = recommend_top_jobs_streaming(iter_job_data(csv_file, chunk_size), user_profile, k)
+                assert num_matches == expected_matches
+                assert actual.index.tolist() == expected.index.tolist()
+                for column in ['job_id', 'relevance_score', 'technical_skills', 'preferred_traits']:
+                    assert actual[column].tolist() == expected[column].tolist(), column
+                load_job_data(csv_file)
+
+# Check that batch recommendations match one recommend_top_jobs call per profile
+def check_batch(seed=0, num_jobs=500, num_profiles=50, k=10):
+    jobs_df = random_dataset(seed, num_jobs)
+    rng = random.Random(seed)
+    user_profiles = [random_profile(rng) for _ in range(num_profiles)]
+
+    # Small blocks so the running top-K is merged across several blocks
+    job_ids, scores = recommend_jobs_batch(jobs_df, user_profiles, k, profile_block=16, job_block=128)
+    for user_profile, profile_job_ids, profile_scores in zip(user_profiles, job_ids, scores):
+        expected, _ = recommend_top_jobs(jobs_df, user_profile, k)
+        assert profile_job_ids.tolist() == expected['job_id'].tolist()
+        assert profile_scores.tolist() == expected['relevance_score'].tolist()
+
+# Check that a store built from many small appends ranks like the whole dataset,
+# after automatic and full compaction and after reopening from disk
+def check_store_compaction(seed=0, num_jobs=500, num_profiles=10, batch_size=10):
+    jobs_df = apply_job_schema(random_dataset(seed, num_jobs))
+    rng = random.Random(seed)
+    user_profiles = [random_profile(rng) for _ in range(num_profiles)]
+    split = num_jobs // 5
+
+    def check(store):
+        assert len(store) == num_jobs
+        for user_profile in user_profiles:
+            expected, expected_matches = recommend_top_jobs(jobs_df, user_profile, 20, ["Remote"])
+            actual, num_matches = store.recommend(user_profile, 20, ["Remote"])
+            assert num_matches == expected_matches
+            assert ranking(actual) == ranking(expected)
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = JobStore(directory, jobs_df.iloc[:split])
+        for start in range(split, num_jobs, batch_size):
+            store.append(jobs_df.iloc[start:start + batch_size])
+            assert len(store.small_segments()) <= MAX_SMALL_SEGMENTS
+        check(store)
+        check(JobStore(directory, jobs_df.iloc[:split]))
+        store.compact()
+        assert len(store.segments) == 1
+        check(store)
+        reopened = JobStore(directory, jobs_df.iloc[:split])
+        assert list(reopened.segments) == list(store.segments)
+        check(reopened)
+
+# Check the semantic index against brute-force cosine similarity, and that it
+# retrieves what a reader would expect for aliases, titles and unknown words
+def check_semantic(seed=0, num_jobs=500, chunk_size=128):
+    jobs_df = apply_job_schema(random_dataset(seed, num_jobs))
+    texts = semantic_texts(jobs_df)
+    index = SemanticIndex.build(lambda: (texts[start:start + chunk_size] for start in range(0, num_jobs, chunk_size)))
+    assert len(index) == num_jobs
+
+    # Dense TF-IDF matrix over the same terms, cosine computed directly
+    documents, hashes, counts = term_hashes(texts)
+    used, columns = np.unique(hashes, return_inverse=True)
+    idf = np.log((1 + num_jobs) / (1 + np.bincount(columns))) + 1
+    matrix = np.zeros((num_jobs, len(used)))
+    matrix[documents, columns] = (1 + np.log(counts)) * idf[columns]
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    rng = random.Random(seed)
+    for _ in range(5):
+        text = texts[rng.randrange(num_jobs)].as_py()
+        _, query_hashes, query_counts = term_hashes(pa.array([text]))
+        query_columns = np.searchsorted(used, query_hashes)
+        query = np.zeros(len(used))
+        query[query_columns] = (1 + np.log(query_counts)) * idf[query_columns]
+        expected = matrix @ (query / np.linalg.norm(query))
+        # Weights are stored at half precision
+        assert np.allclose(index.similarities(text), expected, atol=2e-3)
+
+    titles = jobs_df['title'].astype(str)
+    for title in titles.drop_duplicates().head(10):
+        positions, _ = index.search(title, min(5, int((titles == title).sum())))
+        # "Teacher" may also find a "Special Education Teacher"
+        assert titles.iloc[positions].str.contains(title, regex=False).all(), title
+    machine_learning = [text.as_py() for text in texts if "Machine Learning" in text.as_py()]
+    positions, _ = index.search("ML", 10)
+    assert len(positions) == min(10, len(machine_learning))
+    assert all("Machine Learning" in texts[position].as_py() for position in positions)
+    positions, similarities = index.search("zzzz qqqq", 10)
+    assert len(positions) == 0 and not index.similarities("zzzz qqqq").any()
+
+# Scoring backends checked by the fuzz harness, by name. Each takes a FuzzDataset,
+# a profile, k and the additional filters, and returns (job ids, relevance scores)
+# of the top k matching jobs, best first
+SCORING_BACKENDS = {}
+
+def scoring_backend(name):
+    def register(backend):
+        SCORING_BACKENDS[name] = backend
+        return backend
+    return register
+
+class FuzzDataset:
+    """A seeded random dataset, plus the other forms backends read it in, built on first use"""
+
+    def __init__(self, seed, num_jobs, missing_rate, directory):
+        self.seed = seed
+        self.frame = random_dataset(seed, num_jobs, missing_rate)
+        self.directory = directory
+        self.cached = {}
+
+    def build(self, name, make):
+        if name not in self.cached:
+            self.cached[name] = make()
+        return self.cached[name]
+
+    def compact(self):
+        return self.build("compact", lambda: apply_job_schema(self.frame))
+
+    def csv_file(self):
+        def write():
+            path = os.path.join(self.directory, f"postings_{self.seed}.csv")
+            self.frame.to_csv(path, index=False)
+            return path
+        return self.build("csv_file", write)
+
+    def store(self):
+        # The last third of the postings is appended as a segment, so rankings span frames
+        def open_store():
+            split = len(self.frame) * 2 // 3
+            store = JobStore(os.path.join(self.directory, f"segments_{self.seed}"), apply_job_schema(self.frame.iloc[:split]))
+            store.append(self.frame.iloc[split:])
+            return store
+        return self.build("store", open_store)
+
+    # Build every form and index up front, so backend timings cover ranking only
+    def prepare(self):
+        self.csv_file()
+        for frame in [self.frame, self.compact()] + self.store().frames():
+            get_job_index(frame)
+
+# Job ids and scores of a results frame
+def ranking(results):
+    return results['job_id'].tolist(), results['relevance_score'].tolist()
+
+@scoring_backend("vectorized")
+def backend_vectorized(dataset, user_profile, k, work_arrangements, min_salary):
+    results = recommend_jobs(dataset.frame, user_profile)
+    if work_arrangements:
+        results = results[results['work_arrangement'].isin(work_arrangements)]
+    if min_salary is not None:
+        results = results[results['salary'] >= min_salary]
+    return ranking(results.head(k))
+
+@scoring_backend("top_k")
+def backend_top_k(dataset, user_profile, k, work_arrangements, min_salary):
+    return ranking(recommend_top_jobs(dataset.frame, user_profile, k, work_arrangements, min_salary)[0])
+
+@scoring_backend("compact_top_k")
+def backend_compact_top_k(dataset, user_profile, k, work_arrangements, min_salary):
+    return ranking(recommend_top_jobs(dataset.compact(), user_profile, k, work_arrangements, min_salary)[0])
+
+@scoring_backend("streaming")
+def backend_streaming(dataset, user_profile, k, work_arrangements, min_salary):
+    chunks = iter_job_data(dataset.csv_file(), chunk_size=97)
+    return ranking(recommend_top_jobs_streaming(chunks, user_profile, k, work_arrangements, min_salary)[0])
+
+@scoring_backend("parallel")
+def backend_parallel(dataset, user_profile, k, work_arrangements, min_salary):
+    return ranking(recommend_top_jobs_parallel(dataset.compact(), user_profile, k, work_arrangements, min_salary, workers=2)[0])
+
+@scoring_backend("batch")
+def backend_batch(dataset, user_profile, k, work_arrangements, min_salary):
+    job_ids, scores = recommend_jobs_batch(dataset.frame, [user_profile], k, work_arrangements, min_salary, job_block=128)
+    return job_ids[0].tolist(), scores[0].tolist()
+
+@scoring_backend("cached_store")
+def backend_cached_store(dataset, user_profile, k, work_arrangements, min_salary):
+    return ranking(dataset.store().recommend(user_profile, k, work_arrangements, min_salary)[0])
+
+# Engagement ranking with only the relevance weight set must keep the relevance order
+@scoring_backend("engagement_relevance_only")
+def backend_engagement_relevance_only(dataset, user_profile, k, work_arrangements, min_salary):
+    weights = {"relevance": 1.0, **{name: 0.0 for name in ENGAGEMENT_FEATURES}}
+    return ranking(recommend_top_jobs(dataset.compact(), user_profile, k, work_arrangements, min_salary, weights)[0])
+
+# Random profile with edge cases: no skills, repeated or unknown items, no preferences
+def fuzz_profile(rng):
+    user_profile = random_profile(rng)
+    if rng.random() < 0.1:
+        user_profile['skills'] = []
+    if rng.random() < 0.1:
+        user_profile['skills'] = user_profile['skills'] + ["Not A Listed Skill"]
+        user_profile['personality'] = user_profile['personality'] + user_profile['personality'][:1]
+    if rng.random() < 0.1:
+        user_profile['preferred_regions'] = []
+    return user_profile
+
+def run_fuzz(seeds=range(20), num_profiles=5, backends=None, directory=None):
+    """
+    Check every scoring backend against the reference ranking on random cases
+
+    Each seed draws a dataset (its size and share of missing skill and trait
+    lists vary), then profiles, k and filters. Every backend must return the
+    same job ids and scores, in the same order, as the reference. Datasets are
+    prepared before timing; the streaming backend still parses its CSV per call.
+
+    Returns:
+    Dictionary with, per backend, the number of cases, total time and speedup
+    over the reference, which is timed on the same cases
+    """
+    backends = backends or list(SCORING_BACKENDS)
+    reference_seconds = 0.0
+    seconds = dict.fromkeys(backends, 0.0)
+    num_cases = 0
+    with tempfile.TemporaryDirectory(dir=directory) as workdir:
+        for seed in seeds:
+            rng = random.Random(seed)
+            dataset = FuzzDataset(seed, rng.choice([1, 7, 60, 500]), rng.choice([0.0, 0.05, 0.5]), workdir)
+            dataset.prepare()
+            for _ in range(num_profiles):
+                user_profile = fuzz_profile(rng)
+                k = rng.choice([0, 1, 10, 50, len(dataset.frame)])
+                work_arrangements = rng.sample(WORK_ARRANGEMENTS, rng.randint(0, 2))
+                min_salary = rng.choice([None, 80000, 150000])
+
+                started = time.perf_counter()
+                expected = recommend_jobs_reference(dataset.frame, user_profile)
+                reference_seconds += time.perf_counter() - started
+                if work_arrangements:
+                    expected = expected[expected['work_arrangement'].isin(work_arrangements)]
+                if min_salary is not None:
+                    expected = expected[expected['salary'] >= min_salary]
+                expected = ranking(expected.head(k))
+
+                for name in backends:
+                    started = time.perf_counter()
+                    actual = SCORING_BACKENDS[name](dataset, user_profile, k, work_arrangements, min_salary)
+                    seconds[name] += time.perf_counter() - started
+                    assert actual == expected, (
+                        f"{name} differs from the reference (seed {seed}, k {k}, filters {work_arrangements} {min_salary}, "
+                        f"profile {user_profile})"
+                    )
+                num_cases += 1
+
+    return {
+        "cases": num_cases,
+        "reference_seconds": reference_seconds,
+        "backends": {
+            name: {"seconds": seconds[name], "speedup": reference_seconds / seconds[name] if seconds[name] else None}
+            for name in backends
+        }
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the optimized scoring paths against the reference ranking")
+    parser.add_argument("--seeds", type=int, default=20, help="number of random datasets for the fuzz harness")
+    parser.add_argument("--profiles", type=int, default=5, help="random profiles per dataset")
+    parser.add_argument("--backends", nargs="+", choices=list(SCORING_BACKENDS), help="backends to fuzz (default: all)")
+    parser.add_argument("--output", help="write the fuzz report as JSON to this file")
+    arguments = parser.parse_args()
+
+    for seed in range(5):
+        check_equivalence(seed)
+        check_streaming(seed)
+        check_batch(seed)
+        check_store_compaction(seed)
+        check_semantic(seed)
+    print("recommend_jobs matches the reference ranking")
+
+    report = run_fuzz(range(arguments.seeds), arguments.profiles, arguments.backends)
+    print(f"All backends match the reference on {report['cases']} random cases")
+    for name, result in report["backends"].items():
+        print(f"{name:28s} {result['seconds'] * 1000:9.1f} ms  speedup {result['speedup']:6.1f}x")
+    if arguments.output:
+        with open(arguments.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
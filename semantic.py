@@ -0,0 +1,299 @@
+# File: semantic.py
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Bumped whenever tokenisation or weighting changes, so older indexes are rebuilt
+SEMANTIC_VERSION = 2
+
+# Abbreviations expanded into words when tokenising, so "ML" matches "Machine Learning"
+SKILL_ALIASES = {
+    "ml": "machine learning",
+    "ai": "artificial intelligence",
+    "js": "javascript",
+    "nodejs": "node js",
+    "k8s": "kubernetes",
+    "ehr": "electronic health records",
+    "emr": "electronic health records",
+    "lms": "learning management systems",
+    "bi": "business intelligence",
+    "powerbi": "power bi",
+    "excel": "microsoft excel",
+    "ux": "ui ux",
+    "ui": "ui ux",
+    "cicd": "ci cd",
+    "3d": "3d modeling",
+    "stats": "statistical analysis",
+    "statistics": "statistical analysis",
+    "tf": "tensorflow"
+}
+
+# Anything that is not part of a word; "c++" and "c#" stay single tokens
+TOKEN_SEPARATOR = r"[^a-z0-9+#]+"
+
+# Stable 64-bit hash of a term (Python's hash() changes between runs); terms are
+# identified by it, as two terms of a dataset practically never share one
+def term_hash(term):
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+
+def expand_aliases(documents, codes, vocabulary):
+    """
+    Replace alias tokens by the words they stand for
+
+    Works on the distinct words only: each word maps to one or more words of a
+    new vocabulary, and the token codes are expanded to match.
+
+    Returns:
+    - (documents, codes, vocabulary) after the expansion
+    """
+    expansions = [SKILL_ALIASES.get(word, word).split() for word in vocabulary]
+    words = sorted(set(word for expansion in expansions for word in expansion))
+    numbers = {word: number for number, word in enumerate(words)}
+    lengths = np.array([len(expansion) for expansion in expansions], dtype=np.int64)
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    expanded = np.array([numbers[word] for expansion in expansions for word in expansion], dtype=np.int64)
+
+    token_lengths = lengths[codes]
+    token_starts = np.repeat(np.cumsum(token_lengths) - token_lengths, token_lengths)
+    codes = expanded[np.repeat(starts[codes], token_lengths) + np.arange(token_lengths.sum()) - token_starts]
+    return np.repeat(documents, token_lengths), codes, words
+
+def term_hashes(texts):
+    """
+    Hashed unigram and bigram counts of every text
+
+    Only the distinct words and word pairs of the batch are hashed in Python;
+    everything per token is vectorised.
+
+    Parameters:
+    - texts: Arrow string array (nulls are empty texts)
+
+    Returns:
+    - (document numbers, term hashes, counts), one entry per distinct term of a
+      document, ordered by document
+    """
+    pieces = pc.split_pattern_regex(pc.utf8_lower(texts), TOKEN_SEPARATOR)
+    documents = pc.list_parent_indices(pieces).to_numpy()
+    words = pc.list_flatten(pieces)
+    keep = pc.not_equal(words, "").to_numpy(zero_copy_only=False)
+    documents = documents[keep]
+    encoded = pc.dictionary_encode(words.filter(pa.array(keep)))
+    codes = encoded.indices.to_numpy().astype(np.int64)
+    if len(codes) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty.astype(np.uint64), empty
+    documents, codes, vocabulary = expand_aliases(documents, codes, encoded.dictionary.to_pylist())
+
+    # Bigrams never span two documents; they are numbered after the unigrams
+    size = len(vocabulary)
+    pairs = np.flatnonzero(documents[1:] == documents[:-1])
+    terms = np.concatenate([codes, size + codes[pairs] * size + codes[pairs + 1]])
+    documents = np.concatenate([documents, documents[pairs]])
+
+    distinct, inverse = np.unique(terms, return_inverse=True)
+    names = [
+        vocabulary[term] if term < size else f"{vocabulary[(term - size) // size]} {vocabulary[(term - size) % size]}"
+        for term in distinct.tolist()
+    ]
+    hashes = np.array([term_hash(name) for name in names], dtype=np.uint64)
+
+    keys, counts = np.unique(documents * len(distinct) + inverse, return_counts=True)
+    return keys // len(distinct), hashes[keys % len(distinct)], counts
+
+# Unit-length TF-IDF weights of every (document, term) entry, in the same order
+def tfidf_weights(documents, terms, counts, idf, num_documents):
+    weights = (1 + np.log(counts)) * idf[terms]
+    norms = np.sqrt(np.bincount(documents, weights=weights * weights, minlength=num_documents))
+    return weights / np.where(norms > 0, norms, 1)[documents]
+
+class SemanticIndex:
+    """
+    Inverted index over sparse, hashed TF-IDF vectors of the job texts
+
+    Terms are the distinct word and word-pair hashes of the dataset, sorted.
+    Every posting keeps its exact unit-length TF-IDF vector, stored per term:
+    the postings containing the term and their weights. A query only
+    reads the lists of its own terms, so its cost grows with how common those
+    terms are rather than with the number of postings, and similarities are
+    exact cosines (no folding, so unrelated terms never add noise). Arrays may
+    be memory-mapped (see load).
+    """
+
+    FILES = ["terms", "idf", "term_offsets", "term_documents", "term_weights"]
+
+    def __init__(self, terms, idf, term_offsets, term_documents, term_weights, metadata=None):
+        self.terms = terms
+        self.idf = idf
+        self.term_offsets = term_offsets
+        self.term_documents = term_documents
+        self.term_weights = term_weights
+        self.metadata = metadata or {}
+
+    def __len__(self):
+        return self.metadata.get("num_documents", 0)
+
+    @classmethod
+    def build(cls, text_chunks, metadata=None):
+        """
+        Build the index from the job texts
+
+        Parameters:
+        - text_chunks: Callable returning a fresh iterator over Arrow string arrays
+          (or lists of strings), covering the postings in order; it is iterated twice
+        - metadata: Dictionary stored with the index, e.g. to tell if it is stale
+
+        Returns:
+        - SemanticIndex with its arrays in memory
+        """
+        # Document frequencies first: they give every chunk the same IDF, and the
+        # length of every term's list, so the second pass writes entries in place
+        terms = np.empty(0, dtype=np.uint64)
+        document_frequency = np.empty(0, dtype=np.int64)
+        num_documents = 0
+        for texts in text_chunks():
+            texts = pa.array(texts, type=pa.string())
+            _, hashes, _ = term_hashes(texts)
+            chunk_terms, chunk_frequency = np.unique(hashes, return_counts=True)
+            terms, inverse = np.unique(np.concatenate([terms, chunk_terms]), return_inverse=True)
+            document_frequency = np.bincount(inverse, weights=np.concatenate([document_frequency, chunk_frequency]), minlength=len(terms)).astype(np.int64)
+            num_documents += len(texts)
+        idf = np.log((1 + num_documents) / (1 + document_frequency)).astype(np.float32) + 1
+
+        term_offsets = np.concatenate([[0], np.cumsum(document_frequency)]).astype(np.int64)
+        term_documents = np.empty(term_offsets[-1], dtype=np.int32)
+        # Weights are stored at half precision; similarities are computed in float32
+        term_weights = np.empty(term_offsets[-1], dtype=np.float16)
+        filled = term_offsets[:-1].copy()
+        first_document = 0
+        for texts in text_chunks():
+            texts = pa.array(texts, type=pa.string())
+            documents, hashes, counts = term_hashes(texts)
+            numbers = np.searchsorted(terms, hashes)
+            weights = tfidf_weights(documents, numbers, counts, idf, len(texts))
+            # Entries come by document; a stable sort by term keeps documents ascending in every list
+            order = np.argsort(numbers, kind="stable")
+            distinct, starts, lengths = np.unique(numbers[order], return_index=True, return_counts=True)
+            targets = np.repeat(filled[distinct] - starts, lengths) + np.arange(len(order))
+            term_documents[targets] = documents[order] + first_document
+            term_weights[targets] = weights[order]
+            filled[distinct] += lengths
+            first_document += len(texts)
+
+        return cls(terms, idf, term_offsets, term_documents, term_weights, {**(metadata or {}), "num_documents": num_documents})
+
+    def save(self, directory):
+        """Write the index to a directory, replacing any previous one atomically"""
+        staging = directory + ".tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        for name in self.FILES:
+            np.save(os.path.join(staging, name + ".npy"), np.asarray(getattr(self, name)))
+        with open(os.path.join(staging, "metadata.json"), "w") as metadata_file:
+            json.dump({**self.metadata, "semantic_version": SEMANTIC_VERSION}, metadata_file)
+        previous = directory + ".old"
+        shutil.rmtree(previous, ignore_errors=True)
+        if os.path.exists(directory):
+            os.replace(directory, previous)
+        os.replace(staging, directory)
+        shutil.rmtree(previous, ignore_errors=True)
+
+    @classmethod
+    def load(cls, directory):
+        """Open a saved index with its arrays memory-mapped, or return None if there is none"""
+        try:
+            with open(os.path.join(directory, "metadata.json")) as metadata_file:
+                metadata = json.load(metadata_file)
+            arrays = [np.load(os.path.join(directory, name + ".npy"), mmap_mode="r") for name in cls.FILES]
+        except (OSError, ValueError):
+            return None
+        if metadata.get("semantic_version") != SEMANTIC_VERSION:
+            return None
+        return cls(*arrays, metadata=metadata)
+
+    def query_terms(self, text):
+        """
+        Term numbers of a free-text query and their unit-length TF-IDF weights
+
+        Terms no posting contains are dropped first: they cannot match, and would
+        only shrink the similarity of everything else.
+        """
+        _, hashes, counts = term_hashes(pa.array([text], type=pa.string()))
+        terms = np.asarray(self.terms)
+        numbers = np.minimum(np.searchsorted(terms, hashes), max(len(terms) - 1, 0))
+        known = terms[numbers] == hashes if len(terms) else np.zeros(len(hashes), dtype=bool)
+        numbers, counts = numbers[known], counts[known]
+        weights = tfidf_weights(np.zeros(len(numbers), dtype=np.int64), numbers, counts, np.asarray(self.idf), 1)
+        return numbers, weights.astype(np.float32)
+
+    def similarities(self, text):
+        """Cosine similarity of a free-text query with every posting; 0 for postings sharing no term with it"""
+        numbers, weights = self.query_terms(text)
+        offsets = np.asarray(self.term_offsets)
+        lists = [slice(offsets[number], offsets[number + 1]) for number in numbers.tolist()]
+        if not lists:
+            return np.zeros(len(self), dtype=np.float32)
+        documents = np.concatenate([self.term_documents[entries] for entries in lists])
+        contributions = np.concatenate([
+            np.asarray(self.term_weights[entries], dtype=np.float32) * weight for entries, weight in zip(lists, weights)
+        ])
+        return np.bincount(documents, weights=contributions, minlength=len(self)).astype(np.float32)
+
+    def search(self, text, k=100):
+        """
+        Top-k postings for a free-text query
+
+        Parameters:
+        - text: Query text (skills, traits or a description of the job)
+        - k: Number of postings to return
+
+        Returns:
+        - (positions, similarities), most similar first, ties by position; postings
+          sharing no term with the query are left out
+        """
+        similarities = self.similarities(text)
+        positions = np.flatnonzero(similarities > 0)
+        if k < len(positions):
+            # Everything above the k-th best similarity, then the first postings tied with it
+            values = similarities[positions]
+            threshold = np.partition(values, len(values) - k)[len(values) - k] if k > 0 else np.inf
+            tied = positions[values == threshold][:k - int((values > threshold).sum())]
+            positions = np.sort(np.concatenate([positions[values > threshold], tied]))
+        top = np.lexsort((positions, -similarities[positions]))
+        return positions[top].astype(np.int64), similarities[positions[top]]
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the semantic index of a job postings CSV")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = commands.add_parser("build", help="build the index next to the CSV ahead of the app's first free-text search")
+    search_parser = commands.add_parser("search", help="print the postings most similar to a free-text query")
+    search_parser.add_argument("query")
+    search_parser.add_argument("-k", type=int, default=10, help="number of postings to print")
+
+    for command_parser in [build_parser, search_parser]:
+        command_parser.add_argument("--csv", default="career_job_postings.csv", help="job postings the index covers")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    # The dataset and its text live in the app; it imports this module lazily, so no cycle
+    from app import load_job_data, load_semantic_index, semantic_index_path
+
+    jobs_df = load_job_data(arguments.csv)
+    started = time.perf_counter()
+    semantic_index = load_semantic_index(semantic_index_path(arguments.csv), jobs_df)
+    if arguments.command == "build":
+        print(f"Semantic index of {len(semantic_index)} postings ready in {time.perf_counter() - started:.1f} s")
+    else:
+        positions, similarities = semantic_index.search(arguments.query, arguments.k)
+        for position, similarity in zip(positions, similarities):
+            job = jobs_df.iloc[position]
+            print(f"{similarity:.3f}  {job['title']} at {job['company_name']}")
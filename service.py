@@ -0,0 +1,451 @@
+# File: service.py
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from app import (
+    SEGMENT_DIRECTORY, JobStore, load_job_data, recommend_jobs_batch, select_top_positions
+)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Largest request body accepted, in bytes
+MAX_BODY_SIZE = 1 << 20
+
+# Smallest top-k scored for a group of requests; deeper windows round up to a power of two
+MIN_BATCH_DEPTH = 16
+
+HTTP_REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+    500: "Internal Server Error"
+}
+
+class RequestError(Exception):
+    """A request the service cannot answer, with the HTTP status to reply with"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+# A request field that must be a list of strings
+def string_list(value, name):
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise RequestError(400, f"{name} must be a list of strings")
+    return value
+
+def parse_recommend_request(body, max_results=None):
+    """
+    Check a decoded /recommend body and fill in the defaults
+
+    Requests are scored together, so anything that could fail while scoring
+    is rejected here. The window offset to offset + k is cut at max_results
+    (the number of postings), since no ranking is longer.
+
+    Returns:
+    - (user_profile, k, offset, work_arrangements, min_salary); k may be 0 past the end
+    """
+    if not isinstance(body, dict):
+        raise RequestError(400, "Request body must be a JSON object")
+    if "skills" not in body:
+        raise RequestError(400, "Invalid recommendation request: skills are required")
+    experience_level = body.get("experience_level")
+    if experience_level is not None and not isinstance(experience_level, str):
+        raise RequestError(400, "experience_level must be a string")
+    user_profile = {
+        "skills": string_list(body["skills"], "skills"),
+        "personality": string_list(body.get("personality", []), "personality"),
+        "preferred_regions": string_list(body.get("preferred_regions", []), "preferred_regions"),
+        "experience_level": experience_level
+    }
+    work_arrangements = string_list(body.get("work_arrangements") or [], "work_arrangements")
+    try:
+        k = int(body.get("k", 10))
+        offset = int(body.get("offset", 0))
+        min_salary = body.get("min_salary")
+        min_salary = None if min_salary is None else int(min_salary)
+    except (TypeError, ValueError) as error:
+        raise RequestError(400, f"Invalid recommendation request: {error!r}")
+    if k < 1 or offset < 0:
+        raise RequestError(400, "k must be positive and offset non-negative")
+    if max_results is not None:
+        offset = min(offset, max_results)
+        k = min(k, max_results - offset)
+    return user_profile, k, offset, work_arrangements, min_salary
+
+class LatencyStats:
+    """Recent request latencies and batch sizes, for the /stats endpoint"""
+
+    def __init__(self, window=10000):
+        self.latencies = deque(maxlen=window)
+        self.batch_sizes = deque(maxlen=window)
+        self.requests = 0
+        self.batches = 0
+
+    def add_request(self, seconds):
+        self.requests += 1
+        self.latencies.append(seconds)
+
+    def add_batch(self, size):
+        self.batches += 1
+        self.batch_sizes.append(size)
+
+    def summary(self):
+        latencies = np.asarray(self.latencies) * 1000
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": float(np.mean(self.batch_sizes)) if self.batch_sizes else 0.0,
+            "latency_ms": {
+                "p50": float(np.percentile(latencies, 50)),
+                "p99": float(np.percentile(latencies, 99)),
+                "max": float(latencies.max())
+            } if len(latencies) else None
+        }
+
+# Depth scored for a window ending at depth: the next power of two, so requests of
+# similar depth share one pass and none carries more than twice the rows it needs
+def batch_depth(depth):
+    return max(MIN_BATCH_DEPTH, 1 << (max(depth, 1) - 1).bit_length())
+
+class RecommendationService:
+    """
+    Recommendations over a job store, scored in micro-batches
+
+    Requests arriving within batch_window seconds of each other (up to
+    max_batch of them) are grouped by their filters and the depth of their
+    window, and every group is scored with one recommend_jobs_batch call per
+    store frame, off the event loop. While a batch is scored the next one
+    collects, so batches grow with the load. The store is refreshed before
+    every batch, so postings appended by other processes are served too.
+    """
+
+    def __init__(self, store, batch_window=0.005, max_batch=256):
+        self.store = store
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue()
+        self.stats = LatencyStats()
+        self.worker = None
+        self.snapshot = None
+        # Read the segments and build the job id lookup up front rather than on the first request
+        self.current_frames()
+
+    def start(self):
+        self.worker = asyncio.get_running_loop().create_task(self.run_batches())
+
+    async def stop(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            try:
+                await self.worker
+            except asyncio.CancelledError:
+                pass
+
+    async def recommend(self, user_profile, k=10, offset=0, work_arrangements=None, min_salary=None):
+        """
+        Queue one recommendation request and wait for its batch
+
+        Returns:
+        (DataFrame with jobs offset to offset + k of the ranking, number of jobs passing the filters)
+        """
+        start = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        filters = (tuple(sorted(work_arrangements or [])), min_salary)
+        await self.queue.put((filters, user_profile, offset, k, future))
+        results, num_matches = await future
+        self.stats.add_request(time.perf_counter() - start)
+        return results, num_matches
+
+    # Collect a batch: wait for one request, then for more until the window closes
+    async def next_batch(self):
+        batch = [await self.queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.batch_window
+        while len(batch) < self.max_batch:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    # Frames of the store after a refresh, and the store positions of their job ids;
+    # the lookup is only rebuilt when the store version changes
+    def current_frames(self):
+        self.store.refresh()
+        with self.store.lock:
+            version = self.store.version
+            frames = self.store.frames()
+        if self.snapshot is None or self.snapshot[0] != version:
+            job_ids = np.concatenate([frame['job_id'].to_numpy() for frame in frames]) if frames else []
+            self.snapshot = version, frames, pd.Index(job_ids)
+        return self.snapshot[1:]
+
+    async def run_batches(self):
+        while True:
+            batch = await self.next_batch()
+            self.stats.add_batch(len(batch))
+            try:
+                frames, job_positions = await asyncio.get_running_loop().run_in_executor(None, self.current_frames)
+            except Exception as error:
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            groups = {}
+            for request in batch:
+                filters, _, offset, count, _ = request
+                groups.setdefault((filters, batch_depth(offset + count)), []).append(request)
+            for ((work_arrangements, min_salary), depth), requests in groups.items():
+                answers = await self.score_requests(frames, job_positions, depth, list(work_arrangements), min_salary, requests)
+                for (_, _, _, _, future), answer in zip(requests, answers):
+                    if future.done():
+                        continue
+                    if isinstance(answer, Exception):
+                        future.set_exception(answer)
+                    else:
+                        future.set_result(answer)
+
+    # Answers (or exceptions) for requests sharing their filters. If the group fails
+    # as a whole, its requests are retried one by one, so one bad request only fails itself
+    async def score_requests(self, frames, job_positions, depth, work_arrangements, min_salary, requests):
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                None, self.score_group, frames, job_positions, depth, work_arrangements, min_salary, requests
+            )
+        except Exception as error:
+            if len(requests) == 1:
+                return [error]
+        answers = []
+        for request in requests:
+            answers += await self.score_requests(frames, job_positions, depth, work_arrangements, min_salary, [request])
+        return answers
+
+    # Score requests sharing their filters and depth in one pass over every frame (runs
+    # in an executor thread); the top depth of each frame are merged by store position
+    def score_group(self, frames, job_positions, depth, work_arrangements, min_salary, requests):
+        profiles = [request[1] for request in requests]
+        frame_results = [recommend_jobs_batch(frame, profiles, depth, work_arrangements, min_salary) for frame in frames]
+        num_matches = int(self.store.filter_mask(work_arrangements, min_salary, frames).sum())
+
+        windows = []
+        for number, (_, _, offset, count, _) in enumerate(requests):
+            job_ids = np.concatenate([job_ids[number] for job_ids, _ in frame_results]) if frames else []
+            scores = np.concatenate([scores[number] for _, scores in frame_results]) if frames else []
+            positions, scores = select_top_positions(
+                job_positions.get_indexer(job_ids), np.asarray(scores, dtype=np.int64), offset + count
+            )
+            windows.append((positions[offset:offset + count], scores[offset:offset + count]))
+
+        # Decode the rows of the whole group at once; decoding is the costly part for small k
+        positions, inverse = np.unique(
+            np.concatenate([window_positions for window_positions, _ in windows]).astype(np.int64), return_inverse=True
+        )
+        rows = self.store.rows(positions, frames).iloc[inverse]
+        rows['relevance_score'] = np.concatenate([window_scores for _, window_scores in windows]).astype(np.int64)
+
+        answers = []
+        start = 0
+        for window_positions, _ in windows:
+            answers.append((rows.iloc[start:start + len(window_positions)], num_matches))
+            start += len(window_positions)
+        return answers
+
+# Read one HTTP/1.1 request; returns None once the client closes the connection
+async def read_request(reader):
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, target, _ = request_line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise RequestError(400, "Malformed request line")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get("content-length", 0) or 0)
+    if length > MAX_BODY_SIZE:
+        raise RequestError(413, "Request body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method, target.split("?", 1)[0], headers, body
+
+def write_response(writer, status, payload, keep_alive=True):
+    body = payload.encode("utf-8") if isinstance(payload, str) else json.dumps(payload).encode("utf-8")
+    writer.write(
+        f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + body
+    )
+
+async def handle_request(service, method, path, body):
+    """
+    Route one request
+
+    Returns:
+    (HTTP status, JSON-serialisable payload or an already encoded JSON string)
+    """
+    if path == "/health":
+        return 200, {"status": "ok", "jobs": len(service.store)}
+    if path == "/stats":
+        return 200, service.stats.summary()
+    if path != "/recommend":
+        raise RequestError(404, f"No such endpoint: {path}")
+    if method != "POST":
+        raise RequestError(405, "Use POST for /recommend")
+
+    try:
+        request = json.loads(body or b"{}")
+    except ValueError:
+        raise RequestError(400, "Request body is not valid JSON")
+    user_profile, k, offset, work_arrangements, min_salary = parse_recommend_request(request, len(service.store))
+    results, num_matches = await service.recommend(user_profile, k, offset, work_arrangements, min_salary)
+    # to_json turns numpy scalars and missing values into JSON
+    return 200, f'{{"num_matches": {num_matches}, "jobs": {results.to_json(orient="records")}}}'
+
+# Serve the requests of one keep-alive connection
+async def handle_connection(service, reader, writer):
+    try:
+        while True:
+            try:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                status, payload = await handle_request(service, method, path, body)
+            except RequestError as error:
+                status, payload, keep_alive = error.status, {"error": str(error)}, False
+            except (ConnectionError, asyncio.IncompleteReadError):
+                raise
+            except Exception as error:
+                # Anything else is the service's fault; the client still gets an answer
+                status, payload, keep_alive = 500, {"error": f"Internal error: {error!r}"}, False
+            write_response(writer, status, payload, keep_alive)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+async def serve(
+    csv_file="career_job_postings.csv", segment_directory=SEGMENT_DIRECTORY, host=DEFAULT_HOST, port=DEFAULT_PORT,
+    batch_window=0.005, max_batch=256
+):
+    """Load the dataset once and serve recommendations over it and its appended segments until cancelled"""
+    service = RecommendationService(JobStore(segment_directory, load_job_data(csv_file)), batch_window, max_batch)
+    service.start()
+    server = await asyncio.start_server(lambda reader, writer: handle_connection(service, reader, writer), host, port)
+    print(f"Serving {len(service.store):,} job postings on http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+# Send one JSON request over an open keep-alive connection
+async def post_json(reader, writer, host, path, payload):
+    body = json.dumps(payload).encode("utf-8")
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+    status_line = await reader.readline()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return int(status_line.split()[1]), json.loads(await reader.readexactly(length))
+
+async def load_test(host=DEFAULT_HOST, port=DEFAULT_PORT, concurrency=32, num_requests=2000, seed=0):
+    """
+    Drive the service with concurrent clients and measure client-side latency
+
+    Parameters:
+    - concurrency: Number of clients, each with its own keep-alive connection
+    - num_requests: Total number of requests over all clients
+
+    Returns:
+    - Dictionary with throughput and p50/p99 latency in milliseconds
+    """
+    from benchmarks import sample_profile
+
+    rng = random.Random(seed)
+    requests = [sample_profile(rng) for _ in range(num_requests)]
+    latencies = []
+
+    async def client(share):
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for user_profile in share:
+                start = time.perf_counter()
+                status, _ = await post_json(reader, writer, host, "/recommend", {**user_profile, "k": 10})
+                if status != 200:
+                    raise RuntimeError(f"Service answered {status}")
+                latencies.append(time.perf_counter() - start)
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(requests[number::concurrency]) for number in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies = np.asarray(latencies) * 1000
+    return {
+        "concurrency": concurrency,
+        "requests": num_requests,
+        "requests_per_second": num_requests / elapsed,
+        "latency_ms": {"p50": float(np.percentile(latencies, 50)), "p99": float(np.percentile(latencies, 99))}
+    }
+
+def parse_arguments(argv=None):
+    parser = argparse.ArgumentParser(description="Headless job recommendation service")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="serve recommendations over HTTP")
+    serve_parser.add_argument("--csv", default="career_job_postings.csv", help="job postings to serve")
+    serve_parser.add_argument("--segments", default=SEGMENT_DIRECTORY, help="directory of postings appended to the dataset")
+    serve_parser.add_argument("--batch-window", type=float, default=0.005, help="seconds to wait for a batch to fill")
+    serve_parser.add_argument("--max-batch", type=int, default=256, help="most requests scored in one batch")
+
+    load_parser = commands.add_parser("load", help="measure latency of a running service under concurrent load")
+    load_parser.add_argument("--concurrency", type=int, default=32)
+    load_parser.add_argument("--requests", type=int, default=2000)
+
+    for command_parser in [serve_parser, load_parser]:
+        command_parser.add_argument("--host", default=DEFAULT_HOST)
+        command_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    arguments = parse_arguments()
+    if arguments.command == "serve":
+        try:
+            asyncio.run(serve(arguments.csv, arguments.segments, arguments.host, arguments.port, arguments.batch_window, arguments.max_batch))
+        except KeyboardInterrupt:
+            pass
+    else:
+        print(json.dumps(asyncio.run(load_test(arguments.host, arguments.port, arguments.concurrency, arguments.requests)), indent=2))
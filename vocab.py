@@ -1,10 +1,526 @@
+import argparse
+import asyncio
+import csv
+import heapq
+import json
+import math
+import os
 import random
 import time
+from array import array
 
-class VocabularyGame:
+# Question categories, in the order they are listed
+CATEGORIES = ["tense", "preposition", "phrasal_verb", "idiom"]
+
+# Separator of the options column in CSV question files
+CSV_OPTION_SEPARATOR = "|"
+
+class Question:
+    """One fill-in-the-blank question; __slots__ keeps large banks compact"""
+    __slots__ = ("category", "question", "answer", "options", "explanation")
+    
+    def __init__(self, category, question, answer, options, explanation):
+        self.category = category
+        self.question = question
+        self.answer = answer
+        self.options = tuple(options)
+        self.explanation = explanation
+    
+    def as_dict(self):
+        return {
+            "question": self.question,
+            "answer": self.answer,
+            "options": list(self.options),
+            "explanation": self.explanation
+        }
+
+class QuestionBank:
+    """
+    All questions in one flat list, with an index array of positions per category
+    
+    Appends are O(1) amortized and sampling k questions is O(k), whatever the
+    size of the bank.
+    """
+    __slots__ = ("questions", "category_positions")
+    
     def __init__(self):
+        self.questions = []
+        self.category_positions = {category: array("l") for category in CATEGORIES}
+    
+    def __len__(self):
+        return len(self.questions)
+    
+    def __getitem__(self, position):
+        return self.questions[position]
+    
+    def add(self, category, question, answer, options, explanation):
+        """Add one question; raises ValueError for an unknown category or an answer missing from the options"""
+        if category not in self.category_positions:
+            raise ValueError(f"Unknown question category: {category!r} (expected one of {', '.join(CATEGORIES)})")
+        record = Question(category, question, answer, options, explanation)
+        if record.answer not in record.options:
+            raise ValueError(f"The answer {answer!r} is not one of the options of: {question}")
+        self.category_positions[category].append(len(self.questions))
+        self.questions.append(record)
+        return record
+    
+    def extend(self, records):
+        """Add questions from dictionaries with category, question, answer, options and explanation"""
+        count = 0
+        for record in records:
+            self.add(record["category"], record["question"], record["answer"], record["options"], record.get("explanation", ""))
+            count += 1
+        return count
+    
+    def category(self, category):
+        """Questions of one category, in the order they were added"""
+        return [self.questions[position] for position in self.category_positions[category]]
+    
+    def sample(self, k, category=None, rng=random):
+        """
+        Draw k distinct questions at random
+        
+        Parameters:
+        - k: Number of questions (at most the number available)
+        - category: Optional category to draw from
+        - rng: Random generator, the random module by default
+        
+        Returns:
+        - List of Question records
+        """
+        # Sampling from a range or an index array picks positions without copying the bank
+        positions = range(len(self.questions)) if category is None else self.category_positions[category]
+        return [self.questions[position] for position in rng.sample(positions, k)]
+    
+    def load_jsonl(self, path):
+        """Import questions from a JSON lines file, one question object per line"""
+        with open(path, encoding="utf-8") as lines:
+            return self.extend(json.loads(line) for line in lines if line.strip())
+    
+    def load_csv(self, path):
+        """Import questions from a CSV file with a header; options are separated by CSV_OPTION_SEPARATOR"""
+        with open(path, newline="", encoding="utf-8") as csv_file:
+            return self.extend(
+                {**row, "options": row["options"].split(CSV_OPTION_SEPARATOR)}
+                for row in csv.DictReader(csv_file)
+            )
+    
+    def load(self, path):
+        """Import questions from a .jsonl or .csv file"""
+        if path.lower().endswith(".csv"):
+            return self.load_csv(path)
+        return self.load_jsonl(path)
+
+# Seconds in one SM-2 interval unit
+REVIEW_DAY = 24 * 60 * 60
+
+class ReviewScheduler:
+    """
+    SM-2 spaced repetition for one learner over a QuestionBank
+    
+    Per-question state lives in typed arrays indexed by bank position. Answered
+    questions wait in heaps keyed on (due time, easiness), so overdue and
+    difficult questions come first; questions never asked wait in other heaps
+    in a per-learner shuffled order. Both kinds of heap are kept per category,
+    and only merged when questions of every category are asked for. An update
+    pushes a new entry and leaves the old one to be skipped lazily, so choosing
+    a question stays O(log n).
+    """
+    
+    # Saved per reviewed question, in this order (see save)
+    STATE_ARRAYS = [("easiness", "f"), ("interval", "f"), ("repetitions", "H"), ("due", "d"), ("attempts", "I"), ("correct", "I")]
+    
+    def __init__(self, bank, seed=0):
+        self.bank = bank
+        self.seed = seed
+        self.easiness = array("f")
+        self.interval = array("f")
+        self.repetitions = array("H")
+        self.due = array("d")
+        self.attempts = array("I")
+        self.correct = array("I")
+        # Bumped on every update, so heap entries of older states can be recognised
+        self.stamps = array("I")
+        self.category_history = {category: [0, 0] for category in CATEGORIES}
+        # Heaps of answered and of never asked questions, by category
+        self.reviews = {category: [] for category in CATEGORIES}
+        self.new = {category: [] for category in CATEGORIES}
+        self.sync()
+    
+    # Start tracking questions added to the bank since the last call
+    def sync(self):
+        start = len(self.due)
+        count = len(self.bank) - start
+        if count <= 0:
+            return
+        self.easiness.extend([2.5] * count)
+        self.interval.extend([0.0] * count)
+        self.repetitions.extend([0] * count)
+        self.due.extend([0.0] * count)
+        self.attempts.extend([0] * count)
+        self.correct.extend([0] * count)
+        self.stamps.extend([0] * count)
+        # New questions are ordered by a shuffle key that varies per learner
+        categories = set()
+        for position in range(start, len(self.bank)):
+            category = self.bank[position].category
+            self.new[category].append(((position * 2654435761 + self.seed) & 0xFFFFFFFF, 0.0, position, 0))
+            categories.add(category)
+        for category in categories:
+            heapq.heapify(self.new[category])
+    
+    # Heap entries end with (position, stamp) in both heaps
+    def review_entry(self, position):
+        return (self.due[position], self.easiness[position], position, self.stamps[position])
+    
+    def take(self, heaps, k, until, chosen, stale):
+        # Positions of up to k live entries not in chosen, in key order across the heaps,
+        # stopping at the first entry keyed at or after until; the live entries popped
+        # are pushed back
+        taken = []
+        kept = []
+        while len(taken) < k:
+            top = None
+            for heap in heaps:
+                while heap and stale(heap[0]):
+                    heapq.heappop(heap)
+                if heap and heap[0][0] < until and (top is None or heap[0] < top[0]):
+                    top = heap
+            if top is None:
+                break
+            entry = heapq.heappop(top)
+            kept.append((top, entry))
+            if entry[2] not in chosen:
+                taken.append(entry[2])
+        for heap, entry in kept:
+            heapq.heappush(heap, entry)
+        return taken
+    
+    def next_questions(self, k, category=None, now=None):
+        """
+        Positions of the k questions to ask next
+        
+        Reviews that are due come first (most overdue, then hardest), then new
+        questions, then reviews that are not due yet. The heaps are left as they
+        were, apart from dropping stale entries, so asking without answering
+        changes nothing. Each question costs O(log n) with a category, and
+        O(log n) per category without one.
+        """
+        self.sync()
+        now = time.time() if now is None else now
+        categories = CATEGORIES if category is None else [category]
+        reviews = [self.reviews[name] for name in categories]
+        new = [self.new[name] for name in categories]
+        chosen = []
+        
+        def review_stale(entry):
+            return entry[3] != self.stamps[entry[2]]
+        
+        chosen += self.take(reviews, k, math.nextafter(now, math.inf), (), review_stale)
+        chosen += self.take(new, k - len(chosen), math.inf, (), lambda entry: self.attempts[entry[2]] > 0)
+        # Due reviews come up again here, so they are skipped
+        chosen += self.take(reviews, k - len(chosen), math.inf, set(chosen), review_stale)
+        return chosen
+    
+    def record(self, position, quality, now=None):
+        """
+        Update a question with an SM-2 answer quality from 0 (blackout) to 5 (perfect)
+        
+        Qualities of 3 and up count as correct and lengthen the interval (1 day,
+        6 days, then interval x easiness); lower ones start the question over.
+        """
+        now = time.time() if now is None else now
+        if quality >= 3:
+            if self.repetitions[position] == 0:
+                self.interval[position] = 1
+            elif self.repetitions[position] == 1:
+                self.interval[position] = 6
+            else:
+                self.interval[position] = round(self.interval[position] * self.easiness[position])
+            self.repetitions[position] = min(self.repetitions[position] + 1, 0xFFFF)
+        else:
+            self.repetitions[position] = 0
+            self.interval[position] = 1
+        self.easiness[position] = max(1.3, self.easiness[position] + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        self.due[position] = now + self.interval[position] * REVIEW_DAY
+        
+        history = self.category_history[self.bank[position].category]
+        self.attempts[position] += 1
+        history[0] += 1
+        if quality >= 3:
+            self.correct[position] += 1
+            history[1] += 1
+        
+        self.stamps[position] += 1
+        heapq.heappush(self.reviews[self.bank[position].category], self.review_entry(position))
+    
+    # Record a multiple-choice answer: correct answers as quality 4, wrong ones as 1
+    def record_answer(self, position, correct, now=None):
+        self.record(position, 4 if correct else 1, now)
+    
+    def accuracy(self):
+        """Share of correct answers per category, None for categories never answered"""
+        return {category: correct / attempts if attempts else None for category, (attempts, correct) in self.category_history.items()}
+    
+    def save(self, path):
+        """
+        Write the learner's history compactly
+        
+        A JSON header line is followed by the positions of the reviewed questions
+        and their STATE_ARRAYS values as raw arrays; questions never answered are
+        not stored, so the file grows with the learner's history, not the bank.
+        """
+        reviewed = array("l", (position for position, attempts in enumerate(self.attempts) if attempts))
+        header = {"version": 1, "seed": self.seed, "count": len(reviewed), "category_history": self.category_history}
+        staging = path + ".tmp"
+        with open(staging, "wb") as history_file:
+            history_file.write(json.dumps(header).encode("utf-8") + b"\n")
+            reviewed.tofile(history_file)
+            for name, typecode in self.STATE_ARRAYS:
+                values = getattr(self, name)
+                array(typecode, (values[position] for position in reviewed)).tofile(history_file)
+        os.replace(staging, path)
+    
+    @classmethod
+    def load(cls, bank, path, seed=0):
+        """
+        Read a learner's history, or start a new one if the file does not exist
+        
+        Questions are identified by bank position, so the bank must hold the same
+        questions in the same order as when the history was saved (it may have more).
+        Raises ValueError if the history refers to questions the bank does not have.
+        """
+        if not os.path.exists(path):
+            return cls(bank, seed)
+        with open(path, "rb") as history_file:
+            header = json.loads(history_file.readline())
+            scheduler = cls(bank, header["seed"])
+            reviewed = array("l")
+            reviewed.fromfile(history_file, header["count"])
+            if reviewed and max(reviewed) >= len(bank):
+                raise ValueError(f"{path} is the history of a larger question bank")
+            for name, typecode in cls.STATE_ARRAYS:
+                values = array(typecode)
+                values.fromfile(history_file, header["count"])
+                target = getattr(scheduler, name)
+                for position, value in zip(reviewed, values):
+                    target[position] = value
+        scheduler.category_history = {category: list(counts) for category, counts in header["category_history"].items()}
+        
+        # Reviewed questions leave the new questions for the review heaps
+        for position in reviewed:
+            scheduler.reviews[bank[position].category].append(scheduler.review_entry(position))
+        for heap in scheduler.reviews.values():
+            heapq.heapify(heap)
+        return scheduler
+
+class GameSession:
+    """
+    Progress of one game, kept small so many can be held at once
+    
+    Option orders are not stored: they are derived from the session seed, so each
+    session sees its own shuffle without copying or mutating shared questions.
+    """
+    __slots__ = ("positions", "seed", "current", "score", "scheduler")
+    
+    def __init__(self, positions, seed, scheduler=None):
+        self.positions = array("l", positions)
+        self.seed = seed
+        self.current = 0
+        self.score = 0
+        # ReviewScheduler of the learner playing, if answers are to be remembered
+        self.scheduler = scheduler
+    
+    @property
+    def finished(self):
+        return self.current >= len(self.positions)
+
+class GameEngine:
+    """
+    Game rules as a state machine over GameSession objects
+    
+    No input, output or waiting: every call returns at once, so front ends (the
+    CLI, the asyncio server) decide how questions are shown and answers read.
+    """
+    
+    def __init__(self, bank):
+        self.bank = bank
+    
+    def start(self, num_questions=10, category=None, rng=random, scheduler=None):
+        """
+        Start a game of num_questions distinct questions (fewer if the bank is smaller)
+        
+        Questions are drawn at random, or by the learner's ReviewScheduler when one
+        is given; the scheduler then records every answer of the game.
+        """
+        if scheduler is not None:
+            return GameSession(scheduler.next_questions(num_questions, category), rng.getrandbits(32), scheduler)
+        positions = range(len(self.bank)) if category is None else self.bank.category_positions[category]
+        return GameSession(rng.sample(positions, min(num_questions, len(positions))), rng.getrandbits(32))
+    
+    # Options of the session's current question, in this session's order
+    def options(self, session):
+        question = self.bank[session.positions[session.current]]
+        return random.Random(session.seed * 1000003 + session.current).sample(question.options, len(question.options))
+    
+    def question(self, session):
+        """The current question as a dictionary, or None once the game is over"""
+        if session.finished:
+            return None
+        return {
+            "number": session.current + 1,
+            "total": len(session.positions),
+            "question": self.bank[session.positions[session.current]].question,
+            "options": self.options(session)
+        }
+    
+    def submit(self, session, choice):
+        """
+        Answer the current question and move on to the next one
+        
+        Parameters:
+        - session: GameSession being played
+        - choice: Number of the chosen option, from 1
+        
+        Returns:
+        - Dictionary with correct, chosen, answer, explanation, score and finished
+        
+        Raises ValueError for an out-of-range choice or a finished game.
+        """
+        if session.finished:
+            raise ValueError("The game is over")
+        options = self.options(session)
+        if not 1 <= choice <= len(options):
+            raise ValueError(f"Choice must be between 1 and {len(options)}")
+        
+        question = self.bank[session.positions[session.current]]
+        correct = options[choice - 1] == question.answer
+        if session.scheduler is not None:
+            session.scheduler.record_answer(session.positions[session.current], correct)
+        session.score += correct
+        session.current += 1
+        return {
+            "correct": correct,
+            "chosen": options[choice - 1],
+            "answer": question.answer,
+            "explanation": question.explanation,
+            "score": session.score,
+            "finished": session.finished
+        }
+    
+    def result(self, session):
+        """Final score of a game"""
+        total = len(session.positions)
+        percentage = session.score / total * 100 if total else 0
+        return {"score": session.score, "total": total, "percentage": percentage, "message": score_message(percentage)}
+
+# Verdict shown with the final score
+def score_message(percentage):
+    if percentage >= 90:
+        return "Excellent! You have a great command of English vocabulary!"
+    elif percentage >= 70:
+        return "Good job! You have a solid understanding of English vocabulary."
+    elif percentage >= 50:
+        return "Not bad! Keep practicing to improve your vocabulary skills."
+    else:
+        return "Keep practicing! You'll get better with time."
+
+# Text shared by the front ends
+WELCOME_TEXT = "\n".join([
+    "",
+    "=" * 60,
+    "WELCOME TO THE VOCABULARY FILL-IN-THE-BLANKS GAME!",
+    "=" * 60,
+    "Test your knowledge of English tenses, prepositions, phrasal verbs, and idioms.",
+    "\nInstructions:",
+    "- Read each sentence carefully",
+    "- Choose the correct word to fill in the blank",
+    "- Learn from the explanations after each question",
+    "=" * 60 + "\n"
+])
+
+def format_question(view):
+    lines = [f"\nQuestion {view['number']} of {view['total']}:", view["question"]]
+    lines += [f"{number}. {option}" for number, option in enumerate(view["options"], 1)]
+    return "\n".join(lines)
+
+def format_feedback(outcome):
+    if outcome["correct"]:
+        verdict = "\n✓ Correct! Well done!"
+    else:
+        verdict = f"\n✗ Sorry, that's incorrect. The correct answer is: '{outcome['answer']}'"
+    return f"{verdict}\nExplanation: {outcome['explanation']}"
+
+def format_result(result):
+    return "\n".join([
+        "\n" + "=" * 60,
+        f"GAME OVER! Your final score: {result['score']}/{result['total']}",
+        result["message"],
+        "=" * 60
+    ])
+
+def format_accuracy(accuracy):
+    lines = ["\nYour accuracy so far:"]
+    lines += [f"- {category}: {share:.0%}" for category, share in accuracy.items() if share is not None]
+    return "\n".join(lines)
+
+async def play_over_connection(engine, reader, writer, num_questions=10, idle_timeout=600):
+    """Play games with one client of the TCP server until it stops or goes idle"""
+    async def send(text):
+        writer.write(text.encode("utf-8"))
+        await writer.drain()
+    
+    async def receive(prompt):
+        await send(prompt)
+        line = await asyncio.wait_for(reader.readline(), idle_timeout)
+        if not line:
+            raise ConnectionError("Client disconnected")
+        return line.decode("utf-8", errors="replace").strip()
+    
+    try:
+        await send(WELCOME_TEXT + "\n")
+        while True:
+            session = engine.start(num_questions)
+            view = engine.question(session)
+            while view is not None:
+                await send(format_question(view) + "\n")
+                answer = await receive(f"\nEnter your choice (1-{len(view['options'])}): ")
+                try:
+                    outcome = engine.submit(session, int(answer))
+                except ValueError:
+                    await send(f"Please enter a number between 1 and {len(view['options'])}.\n")
+                    continue
+                await send(format_feedback(outcome) + "\n")
+                view = engine.question(session)
+            await send(format_result(engine.result(session)) + "\n")
+            
+            answer = ""
+            while answer not in ["yes", "y", "no", "n"]:
+                answer = (await receive("\nWould you like to play again? (yes/no): ")).lower()
+            if answer in ["no", "n"]:
+                await send("\nThank you for playing! Goodbye!\n")
+                break
+    except (ConnectionError, asyncio.TimeoutError):
+        pass
+    finally:
+        writer.close()
+
+async def serve_games(engine, host="127.0.0.1", port=8766, num_questions=10):
+    """Host games over TCP (e.g. with `nc host port`), one session per connection"""
+    server = await asyncio.start_server(
+        lambda reader, writer: play_over_connection(engine, reader, writer, num_questions), host, port
+    )
+    print(f"Hosting vocabulary games on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+# Directory of the learners' review histories
+PROGRESS_DIRECTORY = "vocab_progress"
+
+class VocabularyGame:
+    def __init__(self, learner=None):
         # Different categories of questions
-        self.tense_questions = [
+        tense_questions = [
             {
                 "question": "Yesterday, I _____ (go) to the store.",
                 "answer": "went",
@@ -25,7 +541,7 @@ class VocabularyGame:
             }
         ]
         
-        self.preposition_questions = [
+        preposition_questions = [
             {
                 "question": "The book is _____ the table.",
                 "answer": "on",
@@ -46,7 +562,7 @@ class VocabularyGame:
             }
         ]
         
-        self.phrasal_verb_questions = [
+        phrasal_verb_questions = [
             {
                 "question": "Can you _____ (look after) my cat while I'm away?",
                 "answer": "look after",
@@ -67,7 +583,7 @@ class VocabularyGame:
             }
         ]
         
-        self.idiom_questions = [
+        idiom_questions = [
             {
                 "question": "Finding that old photo album was a real _____ down memory lane.",
                 "answer": "trip",
@@ -82,75 +598,73 @@ class VocabularyGame:
             }
         ]
         
-        # Combine all question types
-        self.all_questions = self.tense_questions + self.preposition_questions + self.phrasal_verb_questions + self.idiom_questions
+        # Store every question once in the question bank
+        self.bank = QuestionBank()
+        for category, questions in zip(CATEGORIES, [tense_questions, preposition_questions, phrasal_verb_questions, idiom_questions]):
+            for question in questions:
+                self.bank.add(category, **question)
+        self.engine = GameEngine(self.bank)
+        
+        # With a learner name, questions follow that learner's review schedule
+        self.learner = learner
+        self.scheduler = None
+    
+    def progress_path(self):
+        return os.path.join(PROGRESS_DIRECTORY, f"{self.learner}.srs")
+    
+    def load_progress(self):
+        """The learner's ReviewScheduler, read on first use so imported questions are in the bank by then"""
+        if self.learner and self.scheduler is None:
+            self.scheduler = ReviewScheduler.load(self.bank, self.progress_path(), seed=random.getrandbits(32))
+        return self.scheduler
+    
+    def save_progress(self):
+        """Write the learner's review history, if the game has a learner"""
+        if self.scheduler is None:
+            return
+        os.makedirs(PROGRESS_DIRECTORY, exist_ok=True)
+        self.scheduler.save(self.progress_path())
+    
+    @property
+    def all_questions(self):
+        """All questions as dictionaries (builds a list; use self.bank for large banks)"""
+        return [question.as_dict() for question in self.bank]
         
     def display_welcome(self):
         """Display welcome message and instructions"""
-        print("\n" + "="*60)
-        print("WELCOME TO THE VOCABULARY FILL-IN-THE-BLANKS GAME!")
-        print("="*60)
-        print("Test your knowledge of English tenses, prepositions, phrasal verbs, and idioms.")
-        print("\nInstructions:")
-        print("- Read each sentence carefully")
-        print("- Choose the correct word to fill in the blank")
-        print("- Learn from the explanations after each question")
-        print("="*60 + "\n")
+        print(WELCOME_TEXT)
     
     def play_game(self):
-        """Main game loop"""
+        """Main game loop: a console front end to the game engine"""
         self.display_welcome()
         
-        score = 0
-        questions = random.sample(self.all_questions, min(10, len(self.all_questions)))
-        
-        for i, question in enumerate(questions, 1):
-            print(f"\nQuestion {i} of {len(questions)}:")
-            print(question["question"])
-            
-            # Display options
-            random.shuffle(question["options"])
-            for j, option in enumerate(question["options"], 1):
-                print(f"{j}. {option}")
+        session = self.engine.start(10, scheduler=self.load_progress())
+        view = self.engine.question(session)
+        while view is not None:
+            print(format_question(view))
             
             # Get user input
+            num_options = len(view["options"])
             while True:
                 try:
-                    choice = int(input("\nEnter your choice (1-4): "))
-                    if 1 <= choice <= 4:
+                    choice = int(input(f"\nEnter your choice (1-{num_options}): "))
+                    if 1 <= choice <= num_options:
                         break
                     else:
-                        print("Please enter a number between 1 and 4.")
+                        print(f"Please enter a number between 1 and {num_options}.")
                 except ValueError:
                     print("Please enter a valid number.")
             
-            user_answer = question["options"][choice-1]
-            correct = user_answer == question["answer"]
-            
             # Display result
-            if correct:
-                score += 1
-                print("\n✓ Correct! Well done!")
-            else:
-                print(f"\n✗ Sorry, that's incorrect. The correct answer is: '{question['answer']}'")
-            
-            print(f"Explanation: {question['explanation']}")
+            print(format_feedback(self.engine.submit(session, choice)))
             time.sleep(1)
-            
+            view = self.engine.question(session)
+        
         # Final score
-        print("\n" + "="*60)
-        print(f"GAME OVER! Your final score: {score}/{len(questions)}")
-        percentage = (score / len(questions)) * 100
-        
-        if percentage >= 90:
-            print("Excellent! You have a great command of English vocabulary!")
-        elif percentage >= 70:
-            print("Good job! You have a solid understanding of English vocabulary.")
-        elif percentage >= 50:
-            print("Not bad! Keep practicing to improve your vocabulary skills.")
-        else:
-            print("Keep practicing! You'll get better with time.")
-        print("="*60)
+        print(format_result(self.engine.result(session)))
+        self.save_progress()
+        if self.scheduler is not None:
+            print(format_accuracy(self.scheduler.accuracy()))
         
         return self.play_again()
         
@@ -168,34 +682,47 @@ class VocabularyGame:
 
     def add_custom_question(self, category, question, answer, options, explanation):
         """Add a custom question to the game"""
-        new_question = {
-            "question": question,
-            "answer": answer,
-            "options": options,
-            "explanation": explanation
-        }
-        
-        if category == "tense":
-            self.tense_questions.append(new_question)
-        elif category == "preposition":
-            self.preposition_questions.append(new_question)
-        elif category == "phrasal_verb":
-            self.phrasal_verb_questions.append(new_question)
-        elif category == "idiom":
-            self.idiom_questions.append(new_question)
-            
-        # Update the combined list
-        self.all_questions = self.tense_questions + self.preposition_questions + self.phrasal_verb_questions + self.idiom_questions
+        try:
+            self.bank.add(category, question, answer, options, explanation)
+        except ValueError as error:
+            print(f"Question not added: {error}")
+            return
         
         print(f"New {category} question added successfully!")
+    
+    def import_questions(self, path):
+        """Add every question of a .jsonl or .csv file to the game"""
+        count = self.bank.load(path)
+        print(f"Imported {count} questions from {path}.")
+        return count
 
 # Main program
 if __name__ == "__main__":
-    game = VocabularyGame()
-    play_again = True
+    parser = argparse.ArgumentParser(description="Vocabulary fill-in-the-blanks game")
+    parser.add_argument("--questions", help="question file (.jsonl or .csv) to add to the built-in questions")
+    parser.add_argument("--serve", action="store_true", help="host games for many players over TCP instead of playing here")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--learner", help="name to remember answers under, so questions follow a spaced-repetition schedule")
+    arguments = parser.parse_args()
+    
+    game = VocabularyGame(arguments.learner)
+    if arguments.questions:
+        game.import_questions(arguments.questions)
+    
+    if arguments.serve:
+        try:
+            asyncio.run(serve_games(game.engine, arguments.host, arguments.port))
+        except KeyboardInterrupt:
+            pass
+    else:
+        play_again = True
+        while play_again:
+            play_again = game.play_game()
     
-    while play_again:
-        play_again = game.play_game()
+    # Example of how to import a question bank (JSON lines, or CSV with a header of
+    # category,question,answer,options,explanation and options separated by "|"):
+    # game.import_questions("questions.jsonl")
     
     # Example of how to add custom questions:
     # game.add_custom_question(
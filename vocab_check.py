@@ -0,0 +1,215 @@
+# File: vocab_check.py
+
+import json
+import os
+import random
+import tempfile
+
+from vocab import CATEGORIES, REVIEW_DAY, GameEngine, QuestionBank, ReviewScheduler
+
+# Build a bank of random questions spread over the categories
+def random_bank(seed, num_questions):
+    rng = random.Random(seed)
+    bank = QuestionBank()
+    for number in range(num_questions):
+        options = [f"option {number}.{choice}" for choice in range(rng.randint(2, 5))]
+        bank.add(rng.choice(CATEGORIES), f"Question {number} _____.", rng.choice(options), options, f"Explanation {number}")
+    return bank
+
+# Live entries of heaps by category, as a sorted list, for comparing scheduler states; stamps
+# only tell live entries from stale ones, and start over on load, so they are left out
+def live_entries(heaps, stale):
+    return sorted(entry[:3] for heap in heaps.values() for entry in heap if not stale(entry))
+
+def scheduler_state(scheduler):
+    return (
+        [list(getattr(scheduler, name)) for name, _ in ReviewScheduler.STATE_ARRAYS],
+        scheduler.category_history,
+        live_entries(scheduler.reviews, lambda entry: entry[3] != scheduler.stamps[entry[2]]),
+        live_entries(scheduler.new, lambda entry: scheduler.attempts[entry[2]] > 0)
+    )
+
+# Check that the bank validates questions, keeps category positions and samples without repeats
+def check_question_bank(seed=0, num_questions=200):
+    bank = random_bank(seed, num_questions)
+    rng = random.Random(seed)
+
+    for category in CATEGORIES:
+        assert [question.category for question in bank.category(category)] == [category] * len(bank.category(category))
+    assert sum(len(bank.category(category)) for category in CATEGORIES) == len(bank)
+
+    for category in [None] + CATEGORIES:
+        available = len(bank) if category is None else len(bank.category(category))
+        sample = bank.sample(min(10, available), category, rng)
+        assert len(set(map(id, sample))) == len(sample)
+        assert category is None or all(question.category == category for question in sample)
+
+    for category, answer in [("unknown", "a"), ("tense", "missing")]:
+        try:
+            bank.add(category, "Question _____.", answer, ["a", "b"], "")
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"add accepted category {category!r} with answer {answer!r}")
+    assert len(bank) == num_questions
+
+    # A bank written as JSON lines reads back the same
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "questions.jsonl")
+        with open(path, "w", encoding="utf-8") as lines:
+            for question in bank.questions:
+                lines.write(json.dumps({"category": question.category, **question.as_dict()}) + "\n")
+        loaded = QuestionBank()
+        assert loaded.load(path) == len(bank)
+        assert [question.as_dict() for question in loaded.questions] == [question.as_dict() for question in bank.questions]
+
+# Check the SM-2 schedule: due reviews before new questions, resets and not-yet-due reviews last
+def check_scheduler(seed=0, num_questions=100):
+    bank = random_bank(seed, num_questions)
+    rng = random.Random(seed)
+    scheduler = ReviewScheduler(bank, seed)
+    now = 1000.0 * REVIEW_DAY
+
+    # Nothing answered yet: every question is new, and each is asked once
+    first = scheduler.next_questions(num_questions, now=now)
+    assert sorted(first) == list(range(num_questions))
+
+    answered = first[:20]
+    for position in answered:
+        scheduler.record_answer(position, rng.random() < 0.5, now)
+    for position in answered:
+        assert scheduler.attempts[position] == 1
+        if scheduler.correct[position] == 0:
+            assert scheduler.interval[position] == 1 and scheduler.repetitions[position] == 0
+
+    # Two days later every answered question is due, and comes before the new ones
+    later = now + 2 * REVIEW_DAY
+    chosen = scheduler.next_questions(30, now=later)
+    assert set(chosen[:20]) == set(answered)
+    assert all(scheduler.attempts[position] == 0 for position in chosen[20:])
+
+    # Right after answering, nothing is due: new questions first, reviews after them
+    chosen = scheduler.next_questions(num_questions, now=now)
+    assert set(chosen[-20:]) == set(answered)
+
+    # Only questions of the category are chosen, each once
+    for category in CATEGORIES:
+        chosen = scheduler.next_questions(num_questions, category, now=later)
+        assert len(set(chosen)) == len(chosen) == len(bank.category(category))
+        assert all(bank[position].category == category for position in chosen)
+
+    # A wrong answer starts a well-known question over
+    position = answered[0]
+    for day in range(5):
+        scheduler.record_answer(position, True, now + day * 30 * REVIEW_DAY)
+    assert scheduler.interval[position] > 6
+    scheduler.record_answer(position, False, now + 200 * REVIEW_DAY)
+    assert scheduler.interval[position] == 1 and scheduler.repetitions[position] == 0
+    assert scheduler.due[position] == now + 201 * REVIEW_DAY
+
+# Check that asking without answering leaves the scheduler as it was
+def check_next_questions_read_only(seed=0, num_questions=100):
+    bank = random_bank(seed, num_questions)
+    rng = random.Random(seed)
+    scheduler = ReviewScheduler(bank, seed)
+    now = 1000.0 * REVIEW_DAY
+    for position in rng.sample(range(num_questions), 40):
+        for _ in range(rng.randint(1, 3)):
+            scheduler.record_answer(position, rng.random() < 0.7, now + rng.random() * REVIEW_DAY)
+
+    before = scheduler_state(scheduler)
+    for _ in range(20):
+        category = rng.choice([None] + CATEGORIES)
+        when = now + rng.random() * 10 * REVIEW_DAY
+        expected = scheduler.next_questions(rng.randint(1, num_questions), category, now=when)
+        assert scheduler_state(scheduler) == before
+        assert scheduler.next_questions(len(expected), category, now=when) == expected
+
+# Check that a saved history loads back to the same state and schedule
+def check_save_load(seed=0, num_questions=100):
+    bank = random_bank(seed, num_questions)
+    rng = random.Random(seed)
+    scheduler = ReviewScheduler(bank, seed)
+    now = 1000.0 * REVIEW_DAY
+    for position in rng.sample(range(num_questions), 30):
+        scheduler.record(position, rng.randint(0, 5), now + rng.random() * REVIEW_DAY)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "learner.bin")
+        assert scheduler_state(ReviewScheduler.load(bank, path, seed)) == scheduler_state(ReviewScheduler(bank, seed))
+
+        scheduler.save(path)
+        loaded = ReviewScheduler.load(bank, path)
+        assert loaded.seed == scheduler.seed
+        # Every question waits in the heaps of its own category
+        for state in [scheduler, loaded]:
+            for heaps in [state.reviews, state.new]:
+                assert all(bank[entry[2]].category == category for category, heap in heaps.items() for entry in heap)
+        assert scheduler_state(loaded) == scheduler_state(scheduler)
+        assert loaded.accuracy() == scheduler.accuracy()
+        for when in [now, now + 3 * REVIEW_DAY, now + 30 * REVIEW_DAY]:
+            assert loaded.next_questions(num_questions, now=when) == scheduler.next_questions(num_questions, now=when)
+
+        # The history only covers the first questions of a smaller bank
+        try:
+            ReviewScheduler.load(random_bank(seed, 5), path)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("load accepted the history of a larger bank")
+
+# Check that sessions shuffle options on their own, score answers and never change the bank
+def check_game_engine(seed=0, num_questions=50, num_sessions=20):
+    bank = random_bank(seed, num_questions)
+    rng = random.Random(seed)
+    engine = GameEngine(bank)
+    options = [question.options for question in bank.questions]
+
+    orders = set()
+    for _ in range(num_sessions):
+        session = engine.start(5, rng.choice([None] + CATEGORIES), rng)
+        assert len(set(session.positions)) == len(session.positions)
+        score = 0
+        while not session.finished:
+            view = engine.question(session)
+            question = bank[session.positions[session.current]]
+            assert view["question"] == question.question
+            assert sorted(view["options"]) == sorted(question.options)
+            # The same question shows the same order until it is answered
+            assert engine.question(session)["options"] == view["options"]
+            orders.add((session.positions[session.current], tuple(view["options"])))
+
+            try:
+                engine.submit(session, len(view["options"]) + 1)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError("submit accepted an out-of-range choice")
+            choice = rng.randint(1, len(view["options"]))
+            outcome = engine.submit(session, choice)
+            score += view["options"][choice - 1] == question.answer
+            assert outcome["correct"] == (view["options"][choice - 1] == question.answer)
+            assert outcome["score"] == score
+        assert engine.question(session) is None
+        assert engine.result(session)["score"] == score
+
+    # Option orders differ between sessions, while the shared questions keep theirs
+    assert len(orders) > len({position for position, _ in orders})
+    assert [question.options for question in bank.questions] == options
+
+    # A game played with a scheduler records every answer
+    scheduler = ReviewScheduler(bank, seed)
+    session = engine.start(10, rng=rng, scheduler=scheduler)
+    while not session.finished:
+        engine.submit(session, 1)
+    assert sum(scheduler.attempts) == 10
+    assert all(scheduler.attempts[position] == 1 for position in session.positions)
+
+if __name__ == "__main__":
+    for seed in range(5):
+        check_question_bank(seed)
+        check_scheduler(seed)
+        check_next_questions_read_only(seed)
+        check_save_load(seed)
+        check_game_engine(seed)
+    print("Question bank, review scheduler and game engine checks pass")